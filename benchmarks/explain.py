@@ -0,0 +1,157 @@
+"""
+Seed a large dataset and print the query plan of the main query behind
+every djangovoice URL pattern.
+
+    DJANGO_SETTINGS_MODULE=benchmarks.settings \
+        python -m benchmarks.explain --feedback 400000
+
+The tables are analyzed first, so the planner has statistics. The exit
+status is non-zero when a plan scans djangovoice_feedback without an
+index or sorts it in a temporary B-tree.
+"""
+import sys
+from optparse import OptionParser
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.test.client import RequestFactory
+from djangovoice.feeds import LatestFeedback
+from djangovoice.models import Feedback, Status, Type
+from djangovoice.views import FeedbackListView
+from benchmarks.seed import setup_database, seed_feedback
+
+
+def list_queryset(user, sort='new', **kwargs):
+    view = FeedbackListView()
+    view.request = RequestFactory().get('/', {'sort': sort})
+    view.request.user = user
+    view.kwargs = kwargs
+
+    return view.get_queryset()
+
+
+def feed_queryset(**kwargs):
+    feed = LatestFeedback()
+
+    return feed.items(feed.get_object(None, **kwargs))
+
+
+def build_queries():
+    anonymous = AnonymousUser()
+    staff = User(id=0, username='staff', is_staff=True)
+    owner = User.objects.filter(username__startswith='bench')[0]
+    type_slug = Type.objects.all()[0].slug
+    status_slug = Status.objects.all()[0].slug
+    feedback = Feedback.objects.filter(slug__isnull=False)[:1]
+    feedback = feedback and feedback[0] or Feedback.objects.all()[0]
+
+    queries = []
+    for name, user in (('anonymous', anonymous), ('staff', staff)):
+        for sort in FeedbackListView.orderings:
+            for feedback_list in ('all', 'open', 'closed'):
+                queries.append((
+                    'djangovoice_list %s %s sort=%s' % (
+                        feedback_list, name, sort),
+                    list_queryset(user, sort, list=feedback_list)))
+                queries.append((
+                    'djangovoice_list_type %s/%s %s sort=%s' % (
+                        feedback_list, type_slug, name, sort),
+                    list_queryset(user, sort, list=feedback_list,
+                                  type=type_slug)))
+                queries.append((
+                    'djangovoice_list_type_status %s/%s/%s %s sort=%s' % (
+                        feedback_list, type_slug, status_slug, name, sort),
+                    list_queryset(user, sort, list=feedback_list,
+                                  type=type_slug, status=status_slug)))
+
+    queries.extend([
+        ('djangovoice_home', list_queryset(anonymous)),
+        ('djangovoice_list mine', list_queryset(owner, list='mine')),
+        ('djangovoice_item', Feedback.objects.filter(pk=feedback.pk)),
+        ('djangovoice_slug_item',
+         Feedback.objects.filter(slug=feedback.slug or 'missing')),
+        ('feeds_latest', feed_queryset()),
+    ])
+    for feedback_list in ('all', 'open', 'closed'):
+        queries.extend([
+            ('feeds_list %s' % feedback_list,
+             feed_queryset(list=feedback_list)),
+            ('feeds_list_type %s/%s' % (feedback_list, type_slug),
+             feed_queryset(list=feedback_list, type=type_slug)),
+            ('feeds_list_type_status %s/%s/%s' % (
+                feedback_list, type_slug, status_slug),
+             feed_queryset(list=feedback_list, type=type_slug,
+                           status=status_slug)),
+        ])
+
+    return queries
+
+
+def explain(queryset):
+    """
+    Lines of the query plan, or None when Django knows the query matches
+    no rows without running it, e.g. a filter on a slug missing from the
+    registries.
+    """
+    queryset = queryset[:10]
+    try:
+        sql, params = queryset.query.get_compiler(
+            using=queryset.db).as_sql()
+    except EmptyResultSet:
+        return None
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        prefix = 'EXPLAIN '
+
+    cursor = connection.cursor()
+    cursor.execute(prefix + sql, params)
+
+    return [' '.join(map(unicode, row)) for row in cursor.fetchall()]
+
+
+def is_suspicious(plan):
+    for line in plan:
+        if 'djangovoice_feedback' in line and 'SCAN' in line \
+                and 'INDEX' not in line:
+            return True
+        if 'TEMP B-TREE' in line or 'Seq Scan on djangovoice_feedback' in line:
+            return True
+
+    return False
+
+
+def main(argv=None):
+    parser = OptionParser()
+    parser.add_option('--feedback', type='int', default=100000,
+                      help="Number of feedback rows to seed.")
+    parser.add_option('--users', type='int', default=1000)
+    parser.add_option('--no-seed', action='store_true', default=False,
+                      help="Reuse the data already in the database.")
+    options, args = parser.parse_args(argv)
+
+    setup_database()
+    if not options.no_seed:
+        seed_feedback(options.feedback, options.users)
+    # Plan with statistics, as a production database would.
+    connection.cursor().execute('ANALYZE')
+
+    failures = 0
+    for name, queryset in build_queries():
+        plan = explain(queryset)
+        if plan is None:
+            print '%s (no rows, not queried)' % name
+            continue
+        suspicious = is_suspicious(plan)
+        failures += suspicious
+        print '%s%s' % (suspicious and '!! ' or '', name)
+        for line in plan:
+            print '    %s' % line
+
+    print '%d suspicious plan(s)' % failures
+
+    return failures and 1 or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
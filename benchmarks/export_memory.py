@@ -0,0 +1,66 @@
+"""
+Show that streaming exports run in flat memory. Seeds the database in
+steps and records how much each export raises the peak resident size.
+
+    DJANGO_SETTINGS_MODULE=benchmarks.settings \
+        python -m benchmarks.export_memory --steps 10000,100000,400000
+
+Exits non-zero when the largest export grows the peak by more than
+--tolerance kilobytes over the smallest one.
+"""
+import gc
+import resource
+import sys
+from optparse import OptionParser
+from django.db import reset_queries
+from djangovoice.export import export
+from djangovoice.models import Feedback
+from benchmarks.seed import setup_database, seed_feedback
+
+
+def peak_kilobytes():
+    # ru_maxrss is in kilobytes on Linux and in bytes on Mac OS X.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak /= 1024
+
+    return peak
+
+
+def measure(kind, format, counts):
+    gc.collect()
+    reset_queries()
+    before = peak_kilobytes()
+    lines = size = 0
+    for line in export(kind, format, counts=counts):
+        lines += 1
+        size += len(line)
+
+    return lines, size, peak_kilobytes() - before
+
+
+def main(argv=None):
+    parser = OptionParser()
+    parser.add_option('--steps', default='10000,100000',
+                      help="Comma separated feedback counts to export.")
+    parser.add_option('--format', default='csv')
+    parser.add_option('--tolerance', type='int', default=4096,
+                      help="Allowed peak growth in kilobytes.")
+    options, args = parser.parse_args(argv)
+
+    setup_database()
+    growth = []
+    for step in [int(step) for step in options.steps.split(',')]:
+        missing = step - Feedback.objects.count()
+        if missing > 0:
+            seed_feedback(missing, random_seed=step)
+
+        lines, size, grown = measure('feedback', options.format, True)
+        growth.append(grown)
+        print '%9d rows %12d bytes  peak +%d KB' % (lines, size, grown)
+
+    return growth[-1] - growth[0] > options.tolerance and 1 or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,366 @@
+"""
+Request benchmarks of every djangovoice URL pattern.
+
+    DJANGO_SETTINGS_MODULE=benchmarks.settings \
+        python -m benchmarks.run --feedback 100000 --votes 200000 \
+            --comments 200000 --hot-comments 5000 --output results.json
+
+Each scenario is requested --repeat times, once with an empty cache
+("cold") and once with the cache kept between requests ("warm"). The
+results list the query count, the p50 and p99 latencies in milliseconds
+and the growth of the peak resident memory of every scenario, as JSON.
+Compare two runs, e.g. of two releases, with:
+
+    DJANGO_SETTINGS_MODULE=benchmarks.settings \
+        python -m benchmarks.run --compare before.json after.json
+"""
+import resource
+import sys
+import time
+from optparse import OptionParser
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib import comments
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.db import connection, reset_queries
+from django.utils import simplejson as json
+from django.test.client import Client
+import djangovoice
+from djangovoice.models import Feedback, generate_slug, status_registry, \
+    type_registry
+from djangovoice.utils import CursorPaginator
+from benchmarks.seed import setup_database, seed_comments, seed_feedback, \
+    seed_users, seed_votes
+
+PASSWORD = 'bench'
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+
+    return values[index]
+
+
+def peak_kilobytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak /= 1024
+
+    return peak
+
+
+def get_account(username, is_staff=False):
+    try:
+        user = User.objects.get(username=username)
+    except User.DoesNotExist:
+        user = User(username=username, email='%s@example.com' % username)
+    user.is_staff = is_staff
+    user.set_password(PASSWORD)
+    user.save()
+
+    return user
+
+
+def client_for(user=None, ajax=False):
+    extra = ajax and {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'} or {}
+    client = Client(**extra)
+    if user is not None:
+        client.login(username=user.username, password=PASSWORD)
+
+    return client
+
+
+def deep_cursor(queryset, ordering, fraction=0.5):
+    """
+    Cursor of the page halfway through queryset, as a client that
+    followed "next" links would have.
+    """
+    count = queryset.count()
+    if not count:
+        return ''
+    row = queryset.order_by(*ordering)[int(count * fraction)]
+
+    return CursorPaginator(queryset, 10, ordering).encode_cursor(row, 'n')
+
+
+def build_scenarios(repeat):
+    """
+    (name, client, method, path, data, settings, repeat) of every
+    scenario.
+    """
+    owner = get_account('bench-owner')
+    staff = get_account('bench-staff', is_staff=True)
+    anonymous = client_for()
+    signed_in = client_for(owner)
+    ajax = client_for(owner, ajax=True)
+    admin = client_for(staff)
+
+    feedback_type = type_registry.all()[0].slug
+    status = status_registry.all()[0].slug
+    public = Feedback.objects.filter(private=False)
+    discussed = public.order_by('-comment_count', '-id')[0]
+    pages = public.count() // 10
+    comment_list = comments.get_model().objects.filter(
+        content_type=ContentType.objects.get_for_model(Feedback),
+        object_pk=unicode(discussed.pk))
+    own = Feedback.objects.create(
+        type_id=type_registry.all()[0].pk, title='Benchmark owner feedback',
+        user=owner)
+    anonymous_feedback = Feedback.objects.create(
+        type_id=type_registry.all()[0].pk, title='Benchmark anonymous',
+        slug=generate_slug())
+
+    detail = reverse('djangovoice_item', args=[discussed.pk])
+    scenarios = [
+        ('home', anonymous, 'get', reverse('djangovoice_home'), {}),
+        ('list mine', signed_in, 'get',
+         reverse('djangovoice_list', args=['mine']), {}),
+        ('list deep page', anonymous, 'get',
+         reverse('djangovoice_list', args=['all']),
+         {'page': max(pages // 2, 1)}),
+        ('list deep cursor', anonymous, 'get',
+         reverse('djangovoice_list', args=['all']),
+         {'cursor': deep_cursor(public, ('-created', '-id'))},
+         {'VOICE_CURSOR_PAGINATION': True}),
+        ('detail many comments', anonymous, 'get', detail, {}),
+        ('detail many comments signed in', signed_in, 'get', detail, {}),
+        ('detail deep comment page', anonymous, 'get', detail,
+         {'cursor': deep_cursor(comment_list, ('submit_date', 'id'))}),
+        ('search', anonymous, 'get', reverse('djangovoice_search'),
+         {'q': 'benchmark feedback'}),
+        ('widget', anonymous, 'get', reverse('djangovoice_widget'), {}),
+        ('widget signed in', signed_in, 'get',
+         reverse('djangovoice_widget'), {}),
+        ('submit form', signed_in, 'get', reverse('djangovoice_submit'), {}),
+        ('submit', signed_in, 'post', reverse('djangovoice_submit'),
+         {'type': type_registry.all()[0].pk, 'title': 'Benchmark submit',
+          'description': 'Submitted by the benchmarks.',
+          'ignore_duplicates': '1'}),
+        ('widget submit', signed_in, 'post', reverse('djangovoice_widget'),
+         {'type': type_registry.all()[0].pk, 'title': 'Benchmark widget',
+          'ignore_duplicates': '1'}),
+        ('vote', signed_in, 'post',
+         reverse('djangovoice_vote', args=[discussed.pk, 'up']), {}),
+        ('edit form', signed_in, 'get',
+         reverse('djangovoice_edit', args=[own.pk]), {}),
+        ('delete form', signed_in, 'get',
+         reverse('djangovoice_delete', args=[own.pk]), {}),
+        ('api list', anonymous, 'get', reverse('djangovoice_api_list'), {}),
+        ('api list filtered', anonymous, 'get',
+         reverse('djangovoice_api_list'),
+         {'list': 'open', 'type': feedback_type, 'sort': 'top'}),
+        ('api search', anonymous, 'get', reverse('djangovoice_api_search'),
+         {'q': 'benchmark'}),
+        ('api item', anonymous, 'get',
+         reverse('djangovoice_api_item', args=[discussed.pk]), {}),
+        ('api submit', ajax, 'post', reverse('djangovoice_api_submit'),
+         {'type': type_registry.all()[0].pk, 'title': 'Benchmark api',
+          'ignore_duplicates': '1'}),
+        ('api vote', ajax, 'post',
+         reverse('djangovoice_api_vote', args=[discussed.pk, 'down']), {}),
+        ('feed latest', anonymous, 'get', reverse('feeds_latest'), {}),
+        ('feed filtered', anonymous, 'get',
+         reverse('feeds_list_type_status',
+                 args=['open', feedback_type, status]), {}),
+        ('slug item', anonymous, 'get',
+         reverse('djangovoice_slug_item', args=[anonymous_feedback.slug]),
+         {}),
+        ('export', admin, 'get', reverse('djangovoice_export'),
+         {'kind': 'votes'}, {}, 1),
+    ]
+
+    for feedback_list in ('all', 'open', 'closed'):
+        for sort in ('new', 'top', 'hot', 'discussed'):
+            scenarios.extend([
+                ('list %s sort=%s' % (feedback_list, sort), anonymous, 'get',
+                 reverse('djangovoice_list', args=[feedback_list]),
+                 {'sort': sort}),
+                ('list %s/%s sort=%s' % (feedback_list, feedback_type, sort),
+                 anonymous, 'get',
+                 reverse('djangovoice_list_type',
+                         args=[feedback_list, feedback_type]),
+                 {'sort': sort}),
+                ('list %s/%s/%s sort=%s' % (
+                    feedback_list, feedback_type, status, sort),
+                 anonymous, 'get',
+                 reverse('djangovoice_list_type_status',
+                         args=[feedback_list, feedback_type, status]),
+                 {'sort': sort}),
+            ])
+
+    complete = []
+    for scenario in scenarios:
+        overrides = len(scenario) > 5 and scenario[5] or {}
+        count = len(scenario) > 6 and scenario[6] or repeat
+        complete.append(scenario[:5] + (overrides, count))
+
+    return complete
+
+
+def request(client, method, path, data):
+    response = getattr(client, method)(path, data)
+    content = response.content  # consume streaming responses
+
+    return response.status_code, len(content)
+
+
+def run_scenario(client, method, path, data, overrides, repeat, cold):
+    saved = dict((name, getattr(settings, name, None))
+                 for name in overrides)
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+
+    timings = []
+    before = peak_kilobytes()
+    connection.use_debug_cursor = True
+    try:
+        for index in xrange(repeat):
+            if cold:
+                cache.clear()
+            reset_queries()
+            started = time.time()
+            status, size = request(client, method, path, data)
+            timings.append((time.time() - started) * 1000)
+            queries = len(connection.queries)
+    finally:
+        connection.use_debug_cursor = None
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+    return {
+        'status': status,
+        'bytes': size,
+        'queries': queries,
+        'p50_ms': round(percentile(timings, 0.5), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'peak_memory_kb': peak_kilobytes() - before,
+        'requests': repeat,
+    }
+
+
+def seed(options):
+    setup_database()
+    if options.feedback:
+        seed_feedback(options.feedback, options.users)
+    if options.votes:
+        seed_votes(options.votes, options.users)
+    if options.comments:
+        seed_comments(options.comments, options.users)
+    if options.hot_comments:
+        hot = Feedback.objects.filter(private=False).order_by('-id')[0]
+        seed_comments(options.hot_comments, options.users, [hot.pk])
+    seed_users(options.users)
+
+    call_command('djangovoice_refresh_hot_rank', full=True, verbosity=0)
+    call_command('djangovoice_rebuild_search_index', verbosity=0)
+
+
+def run(options):
+    # Submissions and votes are what is measured, not the rate limits.
+    settings.VOICE_THROTTLE_RATES = {'submit': None, 'vote': None}
+
+    results = []
+    for scenario in build_scenarios(options.repeat):
+        name, client, method, path, data, overrides, repeat = scenario
+        for mode in ('cold', 'warm'):
+            result = run_scenario(client, method, path, data, overrides,
+                                  repeat, mode == 'cold')
+            result.update({'name': name, 'mode': mode, 'path': path})
+            results.append(result)
+            if options.verbose:
+                sys.stderr.write(
+                    '%-45s %-4s %3d queries p50 %8.2f ms p99 %8.2f ms\n' % (
+                        name, mode, result['queries'], result['p50_ms'],
+                        result['p99_ms']))
+
+    return {
+        'djangovoice': djangovoice.__version__,
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'data': {
+            'feedback': Feedback.objects.count(),
+            'votes': options.votes,
+            'comments': options.comments,
+            'hot_comments': options.hot_comments,
+            'users': options.users,
+        },
+        'results': results,
+    }
+
+
+def compare(before_path, after_path, threshold):
+    """
+    Print the scenarios whose query count grew or whose p50 latency grew
+    by more than threshold, and return how many there are.
+    """
+    def load(path):
+        with open(path) as results:
+            return dict(((result['name'], result['mode']), result)
+                        for result in json.load(results)['results'])
+
+    before, after = load(before_path), load(after_path)
+    regressions = 0
+    for key in sorted(after):
+        if key not in before:
+            continue
+        old, new = before[key], after[key]
+        slower = new['p50_ms'] > old['p50_ms'] * (1 + threshold)
+        if new['queries'] > old['queries'] or slower:
+            regressions += 1
+            print '%s (%s): %d -> %d queries, p50 %.2f -> %.2f ms' % (
+                key[0], key[1], old['queries'], new['queries'],
+                old['p50_ms'], new['p50_ms'])
+
+    return regressions
+
+
+def main(argv=None):
+    parser = OptionParser()
+    parser.add_option('--feedback', type='int', default=10000)
+    parser.add_option('--votes', type='int', default=20000)
+    parser.add_option('--comments', type='int', default=20000)
+    parser.add_option('--hot-comments', type='int', default=2000,
+                      help="Extra comments on one feedback, for the "
+                           "detail page scenarios.")
+    parser.add_option('--users', type='int', default=500)
+    parser.add_option('--repeat', type='int', default=20,
+                      help="Requests per scenario and mode.")
+    parser.add_option('--no-seed', action='store_true', default=False,
+                      help="Reuse the data already in the database.")
+    parser.add_option('--output', default=None,
+                      help="File to write the JSON results to.")
+    parser.add_option('--compare', action='store_true', default=False,
+                      help="Compare two result files given as arguments.")
+    parser.add_option('--threshold', type='float', default=0.2,
+                      help="Relative p50 growth reported by --compare.")
+    parser.add_option('--quiet', dest='verbose', action='store_false',
+                      default=True)
+    options, args = parser.parse_args(argv)
+
+    if options.compare:
+        if len(args) != 2:
+            parser.error("--compare needs two result files")
+        return compare(args[0], args[1], options.threshold) and 1 or 0
+
+    if options.no_seed:
+        setup_database()
+    else:
+        seed(options)
+
+    data = json.dumps(run(options), indent=2, sort_keys=True)
+    if options.output:
+        with open(options.output, 'w') as output:
+            output.write(data + '\n')
+    else:
+        print data
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
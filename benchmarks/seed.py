@@ -0,0 +1,130 @@
+"""
+Helpers that build a benchmark database and fill it with synthetic
+feedback.
+"""
+import datetime
+import random
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import transaction
+from djangovoice.models import Feedback, Status, Type, generate_slug
+from djangovoice.utils import auto_now_add_disabled, chunked
+
+
+def setup_database():
+    call_command('syncdb', interactive=False, migrate=True, verbosity=0)
+
+
+def seed_users(count):
+    existing = User.objects.filter(username__startswith='bench').count()
+    with transaction.commit_on_success():
+        User.objects.bulk_create([
+            User(username='bench%d' % index, email='bench%d@example.com' % index)
+            for index in xrange(existing, count)])
+
+    return list(User.objects.filter(
+        username__startswith='bench').values_list('id', flat=True))
+
+
+def seed_feedback(count, users=100, chunk_size=1000, random_seed=0):
+    """
+    Insert ``count`` feedback spread over the last two years with a random
+    mix of types, statuses, owners and private flags.
+    """
+    rng = random.Random(random_seed)
+    user_ids = seed_users(users)
+    status_ids = list(Status.objects.values_list('id', flat=True))
+    type_ids = list(Type.objects.values_list('id', flat=True))
+    now = datetime.datetime.now()
+
+    def build():
+        for index in xrange(count):
+            user_id = rng.random() < 0.8 and rng.choice(user_ids) or None
+            yield Feedback(
+                type_id=rng.choice(type_ids),
+                status_id=rng.choice(status_ids),
+                user_id=user_id,
+                # Anonymous feedback is reached by slug, as in the views.
+                slug=user_id is None and generate_slug() or None,
+                title='Benchmark feedback %d' % index,
+                description='Synthetic feedback used by the benchmarks.',
+                private=rng.random() < 0.1,
+                score=rng.randint(-5, 50),
+                created=now - datetime.timedelta(
+                    seconds=rng.randint(0, 2 * 365 * 24 * 3600)))
+
+    # Keep the generated timestamps so the ordering column has a
+    # realistic spread.
+    with auto_now_add_disabled(Feedback):
+        for chunk in chunked(build(), chunk_size):
+            with transaction.commit_on_success():
+                Feedback.objects.bulk_create(chunk)
+
+
+def seed_votes(count, users=100, chunk_size=1000, random_seed=0):
+    """
+    Insert up to ``count`` votes of distinct (user, feedback) pairs and
+    rebuild the denormalized scores.
+    """
+    from django.contrib.contenttypes.models import ContentType
+    from voting.models import Vote
+
+    rng = random.Random(random_seed)
+    user_ids = seed_users(users)
+    feedback_ids = list(Feedback.objects.values_list('id', flat=True))
+    content_type = ContentType.objects.get_for_model(Feedback)
+    existing = set(Vote.objects.filter(content_type=content_type).values_list(
+        'user_id', 'object_id'))
+
+    def build():
+        for index in xrange(count):
+            pair = (rng.choice(user_ids), rng.choice(feedback_ids))
+            if pair in existing:
+                continue
+            existing.add(pair)
+            yield Vote(user_id=pair[0], content_type=content_type,
+                       object_id=pair[1], vote=rng.random() < 0.8 and 1 or -1)
+
+    for chunk in chunked(build(), chunk_size):
+        with transaction.commit_on_success():
+            Vote.objects.bulk_create(chunk)
+
+    call_command('djangovoice_rebuild_scores', verbosity=0)
+
+
+def seed_comments(count, users=100, feedback_ids=None, chunk_size=1000,
+                  random_seed=0):
+    """
+    Insert ``count`` comments on the given feedback (all feedback by
+    default) and reconcile the denormalized comment counts.
+    """
+    from django.conf import settings
+    from django.contrib import comments
+    from django.contrib.contenttypes.models import ContentType
+
+    rng = random.Random(random_seed)
+    user_ids = seed_users(users)
+    if feedback_ids is None:
+        feedback_ids = list(Feedback.objects.values_list('id', flat=True))
+    content_type = ContentType.objects.get_for_model(Feedback)
+    comment_model = comments.get_model()
+    now = datetime.datetime.now()
+
+    def build():
+        for index in xrange(count):
+            yield comment_model(
+                content_type=content_type,
+                object_pk=unicode(rng.choice(feedback_ids)),
+                site_id=settings.SITE_ID,
+                user_id=rng.choice(user_ids),
+                comment='Benchmark comment %d' % index,
+                submit_date=now - datetime.timedelta(
+                    seconds=rng.randint(0, 365 * 24 * 3600)),
+                is_public=True,
+                is_removed=False)
+
+    for chunk in chunked(build(), chunk_size):
+        with transaction.commit_on_success():
+            comment_model.objects.bulk_create(chunk)
+
+    Feedback.objects.reconcile_comment_counts(chunk_size)
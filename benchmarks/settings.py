@@ -0,0 +1,55 @@
+# Settings for the djangovoice benchmarks. The database defaults to a
+# throwaway SQLite file; point BENCHMARK_DB_* at Postgres to compare plans.
+import os
+import tempfile
+
+DEBUG = False
+TEMPLATE_DEBUG = DEBUG
+
+DATABASES = {
+    'default': {
+        'ENGINE': os.environ.get(
+            'BENCHMARK_DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.environ.get(
+            'BENCHMARK_DB_NAME',
+            os.path.join(tempfile.gettempdir(), 'djangovoice-benchmark.db')),
+        'USER': os.environ.get('BENCHMARK_DB_USER', ''),
+        'PASSWORD': os.environ.get('BENCHMARK_DB_PASSWORD', ''),
+        'HOST': os.environ.get('BENCHMARK_DB_HOST', ''),
+    }
+}
+
+SITE_ID = 1
+USE_I18N = True
+USE_L10N = True
+STATIC_URL = '/static/'
+SECRET_KEY = 'djangovoice-benchmark'
+
+MIDDLEWARE_CLASSES = (
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware'
+)
+
+ROOT_URLCONF = 'benchmarks.urls'
+
+INSTALLED_APPS = (
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.sites',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'django.contrib.admin',
+    'django.contrib.comments',
+    'voting',
+    'gravatar',
+    'south',
+    'djangovoice'
+)
+
+SOUTH_TESTS_MIGRATE = True
+
+VOICE_ALLOW_ANONYMOUS_USER_SUBMIT = True
@@ -0,0 +1,8 @@
+from django.conf.urls.defaults import patterns, include, url
+
+urlpatterns = patterns(
+    '',
+    url(r'^comments/', include('django.contrib.comments.urls')),
+    url(r'^feedback/', include('djangovoice.urls')),
+    url(r'^auth/', include('django.contrib.auth.urls')),
+)
@@ -1,10 +1,103 @@
 from django.contrib import admin
-from djangovoice.models import Feedback, Status, Type
+from django.contrib.admin.views.main import ChangeList
+from django.utils.translation import ugettext as _
+from django.utils.translation import ugettext_lazy
+from djangovoice.models import Feedback, Status, Type, status_registry
+from djangovoice.utils import EstimatedCountPaginator, estimate_count
 
 
 class SlugFieldAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("title",)}
 
 
-admin.site.register(Feedback)
+def make_status_action(status):
+    def action(modeladmin, request, queryset):
+        updated = Feedback.objects.bulk_update_status(queryset, status)
+        modeladmin.message_user(
+            request, _("%(count)d feedback moved to %(status)s.") % {
+                'count': updated, 'status': status.title})
+
+    action.short_description = _("Move to %s") % status.title
+
+    return action
+
+
+def make_private_action(private, description):
+    def action(modeladmin, request, queryset):
+        updated = Feedback.objects.bulk_update(queryset, private=private)
+        modeladmin.message_user(
+            request, _("%d feedback updated.") % updated)
+
+    action.__name__ = private and 'make_private' or 'make_public'
+    action.short_description = description
+
+    return action
+
+
+def mark_duplicates(modeladmin, request, queryset):
+    # Actions get the selection as a queryset, also with "select all", so
+    # only the original is loaded and the rest is one UPDATE.
+    original = list(queryset.order_by('created', 'id').only('id')[:1])
+    updated = original and Feedback.objects.mark_duplicates(
+        queryset, original[0])
+    if not updated:
+        modeladmin.message_user(
+            request, _("Select the original and at least one duplicate."))
+        return
+
+    modeladmin.message_user(
+        request, _("%(count)d feedback marked as duplicates of #%(pk)d.") % {
+            'count': updated, 'pk': original[0].pk})
+mark_duplicates.short_description = ugettext_lazy(
+    "Mark as duplicates of the oldest selected feedback")
+
+
+class FeedbackChangeList(ChangeList):
+    def get_results(self, request):
+        # The total shown next to filtered results is estimated as well.
+        root_query_set = self.root_query_set
+        root_count = root_query_set.count
+
+        def count():
+            estimate = estimate_count(root_query_set)
+            if estimate is not None and \
+                    estimate > EstimatedCountPaginator.threshold:
+                return estimate
+            return root_count()
+
+        root_query_set.count = count
+
+        return super(FeedbackChangeList, self).get_results(request)
+
+
+class FeedbackAdmin(admin.ModelAdmin):
+    list_display = ('title', 'type', 'status', 'user', 'private', 'score',
+                    'num_votes', 'comment_count', 'created')
+    # Every filter column leads one of the feedback list indexes.
+    list_filter = ('status', 'type', 'private')
+    raw_id_fields = ('user', 'duplicate')
+    paginator = EstimatedCountPaginator
+    actions = [mark_duplicates,
+               make_private_action(True, ugettext_lazy("Make private")),
+               make_private_action(False, ugettext_lazy("Make public"))]
+
+    def queryset(self, request):
+        # user is nullable, so a plain select_related() would skip it.
+        return super(FeedbackAdmin, self).queryset(request).select_related(
+            'type', 'status', 'user')
+
+    def get_changelist(self, request, **kwargs):
+        return FeedbackChangeList
+
+    def get_actions(self, request):
+        actions = super(FeedbackAdmin, self).get_actions(request)
+        for status in status_registry.all():
+            name = 'move_to_status_%d' % status.pk
+            action = make_status_action(status)
+            actions[name] = (action, name, action.short_description)
+
+        return actions
+
+
+admin.site.register(Feedback, FeedbackAdmin)
 admin.site.register([Status, Type], SlugFieldAdmin)
@@ -0,0 +1,170 @@
+"""
+Read and vote JSON API for single page applications. Responses carry a
+handful of fields per feedback and are paginated with cursors.
+"""
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET, require_POST
+from djangovoice.decorators import apply_only_xhr, return_json, throttle
+from djangovoice.forms import WidgetForm
+from djangovoice.models import Feedback, VOTE_DIRECTIONS, generate_slug
+from djangovoice.models import status_registry, type_registry
+from djangovoice.search import search
+from djangovoice.utils import cursor_paginate
+from djangovoice.views import FeedbackListView
+from djangovoice.votes import buffering_enabled, queue_vote
+
+
+def serialize(feedback, detail=False):
+    feedback_type = type_registry.get(pk=feedback.type_id)
+    status = status_registry.get(pk=feedback.status_id)
+    data = {
+        'id': feedback.pk,
+        'url': feedback.get_absolute_url(),
+        'title': feedback.title,
+        'type': feedback_type and feedback_type.slug,
+        'status': status and status.slug,
+        'score': feedback.score,
+        'num_votes': feedback.num_votes,
+        'private': feedback.private,
+        'created': feedback.created and feedback.created.isoformat(),
+        'user': feedback.user_id and feedback.user.username,
+    }
+    if detail:
+        data.update({
+            'description': feedback.description,
+            'duplicate': feedback.duplicate_id,
+            'modified': feedback.modified and feedback.modified.isoformat(),
+        })
+
+    return data
+
+
+def can_view(feedback, user, slug=None):
+    if not feedback.private or user.is_staff:
+        return True
+    if feedback.user_id is None:
+        return slug is not None and slug == feedback.slug
+
+    return user.id == feedback.user_id
+
+
+@gzip_page
+@require_GET
+@return_json
+def feedback_list(request):
+    feedback_list = request.GET.get('list', 'open')
+    if feedback_list == 'mine' and not request.user.is_authenticated():
+        return HttpResponse(status=403)
+
+    sort = request.GET.get('sort')
+    if sort not in FeedbackListView.orderings:
+        sort = 'new'
+
+    feedback = Feedback.objects.filter_list(
+        request.user, feedback_list,
+        request.GET.get('type', 'all'),
+        request.GET.get('status', 'all')).select_related('user')
+    page = cursor_paginate(
+        feedback.defer('description'), FeedbackListView.paginate_by,
+        request, FeedbackListView.orderings[sort])
+
+    return {
+        'feedback': [serialize(item) for item in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+@gzip_page
+@require_GET
+@return_json
+def feedback_search(request):
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return {'feedback': []}
+
+    feedback = Feedback.objects.filter_list(
+        request.user, 'all').select_related('user').defer('description')
+    results = search(feedback, query)[:FeedbackListView.paginate_by]
+
+    return {'feedback': [serialize(item) for item in results]}
+
+
+@gzip_page
+@require_GET
+@return_json
+def feedback_detail(request, pk=None, slug=None):
+    if slug is not None:
+        feedback = get_object_or_404(
+            Feedback.objects.select_related('user'), slug=slug)
+    else:
+        feedback = get_object_or_404(
+            Feedback.objects.select_related('user'), pk=pk)
+
+    if not can_view(feedback, request.user, slug):
+        raise Http404
+
+    return {'feedback': serialize(feedback, detail=True)}
+
+
+@throttle('submit')
+@require_POST
+@apply_only_xhr
+@return_json
+def feedback_submit(request):
+    anonymous = request.user.is_anonymous()
+    if anonymous and not getattr(
+            settings, 'VOICE_ALLOW_ANONYMOUS_USER_SUBMIT', False):
+        return HttpResponse(status=403)
+
+    form = WidgetForm(request.POST)
+    if anonymous:
+        del form.fields['anonymous']
+        del form.fields['private']
+    else:
+        del form.fields['email']
+
+    if not form.is_valid():
+        return {'errors': True, 'form_errors': dict(
+            (field, [unicode(error) for error in errors])
+            for field, errors in form.errors.items())}
+
+    feedback = form.save(commit=False)
+    if anonymous:
+        feedback.private = True
+    elif not form.cleaned_data.get('anonymous'):
+        feedback.user = request.user
+
+    if not feedback.user:
+        feedback.slug = generate_slug()
+
+    feedback.save()
+
+    return {'feedback': serialize(feedback, detail=True),
+            'slug': feedback.slug}
+
+
+@throttle('vote')
+@require_POST
+@apply_only_xhr
+@return_json
+def feedback_vote(request, pk, direction):
+    if not request.user.is_authenticated():
+        return HttpResponse(status=403)
+
+    feedback = get_object_or_404(Feedback, pk=pk)
+    if not can_view(feedback, request.user):
+        raise Http404
+
+    vote = VOTE_DIRECTIONS[direction]
+    if buffering_enabled():
+        queue_vote(feedback, request.user, vote)
+        return {'queued': True}
+
+    Feedback.objects.record_vote(feedback, request.user, vote)
+    feedback = Feedback.objects.only('score', 'num_votes').get(pk=pk)
+
+    return {'score': feedback.score, 'num_votes': feedback.num_votes}
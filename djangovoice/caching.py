@@ -0,0 +1,67 @@
+"""
+Versioned cache keys. Every key embeds the current version of the
+namespaces its value depends on. Bumping a namespace version makes all of
+those keys unreachable at once, and the old entries simply expire.
+
+A version missing from the cache, after a restart or an eviction, starts
+again from the current time in milliseconds rather than from 1, so it
+never matches a version that processes or stale keys still remember.
+"""
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.hashcompat import md5_constructor
+
+VERSION_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def get_timeout():
+    return getattr(settings, 'VOICE_CACHE_TIMEOUT', 600)
+
+
+def version_key(namespace):
+    return 'djangovoice:version:%s' % namespace
+
+
+def initial_version():
+    return int(time.time() * 1000)
+
+
+def get_versions(*namespaces):
+    keys = [version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = initial_version()
+            cache.add(key, version, VERSION_TIMEOUT)
+            versions[key] = cache.get(key, version)
+
+    return '.'.join([unicode(versions[key]) for key in keys])
+
+
+def get_version(namespace):
+    return get_versions(namespace)
+
+
+def bump_version(*namespaces):
+    for namespace in namespaces:
+        key = version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, initial_version(), VERSION_TIMEOUT)
+
+
+def make_key(name, *vary_on):
+    args = md5_constructor(u':'.join([unicode(value) for value in vary_on]))
+
+    return 'djangovoice:%s:%s' % (name, args.hexdigest())
+
+
+# Bumped once by set-based updates, instead of the namespace of each
+# updated feedback. Pages of single feedback depend on both.
+BULK_NAMESPACE = 'feedback:bulk'
+
+
+def feedback_namespace(pk):
+    return 'feedback:%s' % pk
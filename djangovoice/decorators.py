@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 
+from functools import wraps
 from django.http import HttpResponse
 from django.utils import simplejson as json
+from django.utils.translation import ugettext as _
+from djangovoice.throttle import check
 
 def apply_only_xhr(original_function):
+    @wraps(original_function)
     def decorated(request, *args, **kwargs):
         if not request.is_ajax():
             return HttpResponse(status=403)
@@ -13,15 +17,44 @@ def apply_only_xhr(original_function):
     return decorated
 
 def return_json(original_function):
+    @wraps(original_function)
     def decorated(request, *args, **kwargs):
         response = original_function(request, *args, **kwargs)
+        if isinstance(response, HttpResponse):
+            return response
+
         if not response:
             response = {'errors': True}
         else:
-            response.update({'errors': False})
+            response.setdefault('errors', False)
 
-        data = json.dumps(response, indent=None).encode('utf-8')
+        data = json.dumps(
+            response, indent=None, separators=(',', ':')).encode('utf-8')
 
         return HttpResponse(data, 'application/json')
 
     return decorated
+
+def throttle(scope, methods=('POST',)):
+    """
+    Answer 429 Too Many Requests when the client went over the rate of
+    scope, see djangovoice.throttle. Only requests with one of the given
+    methods are counted.
+    """
+    def decorator(original_function):
+        @wraps(original_function)
+        def decorated(request, *args, **kwargs):
+            if request.method in methods:
+                wait = check(request, scope)
+                if wait:
+                    response = HttpResponse(
+                        _("Too many requests, please try again later."),
+                        content_type='text/plain', status=429)
+                    response['Retry-After'] = str(wait)
+                    return response
+
+            return original_function(request, *args, **kwargs)
+
+        return decorated
+
+    return decorator
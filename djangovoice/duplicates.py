@@ -0,0 +1,115 @@
+"""
+Near-duplicate detection with MinHash signatures and locality sensitive
+hashing.
+
+Every feedback keeps a signature of NUM_PERMUTATIONS minimum hashes over
+the character shingles of its title and description. The signature is
+split into BANDS bands; each band is stored as an indexed bucket key.
+Texts with a Jaccard similarity above ~0.5 share at least one bucket
+with high probability. So finding candidates is one indexed lookup of
+BANDS keys, followed by comparing their signatures.
+"""
+import base64
+import random
+import re
+import struct
+import zlib
+from django.db import transaction
+from django.utils.hashcompat import md5_constructor
+from djangovoice.models import FeedbackBucket, FeedbackSignature
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 5
+PRIME = 4294967311
+
+_random = random.Random(20120706)
+PERMUTATIONS = [(_random.randint(1, PRIME - 1), _random.randint(0, PRIME - 1))
+                for index in range(NUM_PERMUTATIONS)]
+NON_WORD = re.compile(r'\W+', re.UNICODE)
+
+
+def shingles(text):
+    text = NON_WORD.sub(u' ', text.lower()).strip()
+    if len(text) <= SHINGLE_SIZE:
+        return set([text])
+
+    return set([text[index:index + SHINGLE_SIZE]
+                for index in range(len(text) - SHINGLE_SIZE + 1)])
+
+
+def signature(title, description=u''):
+    hashes = [zlib.crc32(shingle.encode('utf-8')) & 0xffffffff
+              for shingle in shingles(u'%s %s' % (title, description or u''))]
+
+    return [min([(a * value + b) % PRIME for value in hashes]) & 0xffffffff
+            for a, b in PERMUTATIONS]
+
+
+def pack(minhash):
+    return base64.b64encode(struct.pack('>%dI' % NUM_PERMUTATIONS, *minhash))
+
+
+def unpack(data):
+    return struct.unpack('>%dI' % NUM_PERMUTATIONS, base64.b64decode(data))
+
+
+def bucket_keys(minhash):
+    keys = []
+    for band in range(BANDS):
+        rows = minhash[band * ROWS:(band + 1) * ROWS]
+        digest = md5_constructor(struct.pack('>%dI' % ROWS, *rows))
+        keys.append('%02d%s' % (band, digest.hexdigest()[:14]))
+
+    return keys
+
+
+def similarity(first, second):
+    same = sum([1 for a, b in zip(first, second) if a == b])
+
+    return float(same) / NUM_PERMUTATIONS
+
+
+def update_signature(feedback):
+    minhash = signature(feedback.title, feedback.description)
+    with transaction.commit_on_success():
+        FeedbackSignature.objects.filter(feedback=feedback).delete()
+        FeedbackBucket.objects.filter(feedback=feedback).delete()
+        FeedbackSignature.objects.create(
+            feedback=feedback, minhash=pack(minhash))
+        FeedbackBucket.objects.bulk_create([
+            FeedbackBucket(feedback=feedback, key=key)
+            for key in bucket_keys(minhash)])
+
+    return minhash
+
+
+def find_duplicates(queryset, title, description=u'', threshold=0.5,
+                    limit=5, exclude=None):
+    """
+    Feedback of queryset that look like a duplicate of the given text,
+    most similar first.
+    """
+    minhash = signature(title, description)
+    buckets = FeedbackBucket.objects.filter(key__in=bucket_keys(minhash))
+    signatures = FeedbackSignature.objects.filter(
+        feedback__in=buckets.values('feedback'))
+    if exclude is not None:
+        signatures = signatures.exclude(feedback=exclude)
+
+    scores = {}
+    for candidate in signatures:
+        score = similarity(minhash, unpack(candidate.minhash))
+        if score >= threshold:
+            scores[candidate.feedback_id] = score
+
+    if not scores:
+        return []
+
+    feedback = list(queryset.filter(pk__in=scores.keys()))
+    feedback.sort(key=lambda item: scores[item.pk], reverse=True)
+    for item in feedback:
+        item.similarity = scores[item.pk]
+
+    return feedback[:limit]
@@ -0,0 +1,137 @@
+"""
+Streaming export of feedback, votes and comments as CSV or JSON lines.
+Rows are read in primary key chunks and written through generators, so
+memory use does not depend on the size of the table.
+"""
+import csv
+from django.contrib import comments
+from django.contrib.contenttypes.models import ContentType
+from django.utils import simplejson as json
+from voting.models import Vote
+from djangovoice.models import Feedback, status_registry, type_registry
+from djangovoice.utils import queryset_iterator
+
+FORMATS = ('csv', 'jsonl')
+
+FEEDBACK_FIELDS = (
+    'id', 'title', 'description', 'type', 'status', 'private', 'anonymous',
+    'user', 'email', 'slug', 'duplicate', 'created', 'modified')
+COUNT_FIELDS = ('score', 'num_votes', 'comment_count')
+VOTE_FIELDS = ('id', 'feedback', 'user', 'vote')
+COMMENT_FIELDS = (
+    'id', 'feedback', 'user', 'user_name', 'comment', 'submit_date',
+    'is_public', 'is_removed')
+
+
+def feedback_rows(chunk_size=1000, counts=False):
+    feedback = Feedback.objects.select_related('user')
+    for item in queryset_iterator(feedback, chunk_size):
+        feedback_type = type_registry.get(pk=item.type_id)
+        status = status_registry.get(pk=item.status_id)
+        row = {
+            'id': item.pk,
+            'title': item.title,
+            'description': item.description,
+            'type': feedback_type and feedback_type.slug,
+            'status': status and status.slug,
+            'private': item.private,
+            'anonymous': item.anonymous,
+            'user': item.user_id and item.user.username,
+            'email': item.email,
+            'slug': item.slug,
+            'duplicate': item.duplicate_id,
+            'created': item.created,
+            'modified': item.modified,
+        }
+        if counts:
+            row.update({
+                'score': item.score,
+                'num_votes': item.num_votes,
+                'comment_count': item.comment_count,
+            })
+
+        yield row
+
+
+def vote_rows(chunk_size=1000):
+    votes = Vote.objects.filter(
+        content_type=ContentType.objects.get_for_model(Feedback))
+    for vote in queryset_iterator(votes, chunk_size):
+        yield {'id': vote.pk, 'feedback': vote.object_id,
+               'user': vote.user_id, 'vote': vote.vote}
+
+
+def comment_rows(chunk_size=1000):
+    comment_list = comments.get_model().objects.filter(
+        content_type=ContentType.objects.get_for_model(Feedback))
+    for comment in queryset_iterator(comment_list, chunk_size):
+        yield {'id': comment.pk, 'feedback': comment.object_pk,
+               'user': comment.user_id, 'user_name': comment.user_name,
+               'comment': comment.comment,
+               'submit_date': comment.submit_date,
+               'is_public': comment.is_public,
+               'is_removed': comment.is_removed}
+
+
+def get_rows(kind, chunk_size=1000, counts=False):
+    """
+    Field names and row generator of an export kind: feedback, votes or
+    comments.
+    """
+    if kind == 'feedback':
+        fields = FEEDBACK_FIELDS + (counts and COUNT_FIELDS or ())
+        return fields, feedback_rows(chunk_size, counts)
+    if kind == 'votes':
+        return VOTE_FIELDS, vote_rows(chunk_size)
+    if kind == 'comments':
+        return COMMENT_FIELDS, comment_rows(chunk_size)
+
+    raise ValueError("Unknown export kind: %s" % kind)
+
+
+def serialize_value(value):
+    if value is None:
+        return u''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+
+    return unicode(value)
+
+
+class LineBuffer(object):
+    """
+    File-like object that hands back whatever csv.writer writes.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(fields, rows):
+    writer = csv.writer(LineBuffer())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(
+            [serialize_value(row.get(field)).encode('utf-8')
+             for field in fields])
+
+
+def jsonl_lines(fields, rows):
+    for row in rows:
+        yield json.dumps(
+            dict((field, row.get(field)) for field in fields),
+            default=serialize_value,
+            separators=(',', ':')) + '\n'
+
+
+def export(kind, format='csv', chunk_size=1000, counts=False):
+    """
+    Generator of encoded lines of an export.
+    """
+    fields, rows = get_rows(kind, chunk_size, counts)
+    if format == 'csv':
+        return csv_lines(fields, rows)
+    if format == 'jsonl':
+        return jsonl_lines(fields, rows)
+
+    raise ValueError("Unknown export format: %s" % format)
@@ -1,11 +1,94 @@
+from django.contrib.auth.models import AnonymousUser
 from django.contrib.syndication.views import Feed
-from djangovoice.models import Feedback
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.urlresolvers import reverse
+from django.http import HttpResponse
+from django.utils.translation import get_language
+from django.utils.translation import ugettext as _
+from django.views.decorators.http import condition
+from djangovoice.caching import get_timeout, get_versions, make_key
+from djangovoice.instrumentation import count_cache
+from djangovoice.models import Feedback, status_registry, type_registry
+from djangovoice.utils import make_etag
 
 
 class LatestFeedback(Feed):
-    title = "Feedback"
-    link = "/feedback/"
+    """
+    Latest public feedback of a list, optionally narrowed to a type and a
+    status, like the pages of FeedbackListView.
+
+    The rendered feed is cached under the versions of the feeds and
+    taxonomy cache namespaces, which also make up its ETag. The feeds
+    version only moves when feedback itself is saved, deleted or bulk
+    updated, not on votes or comments, so a poll of an unchanged feed is
+    answered from the cache, or with 304 Not Modified, without a database
+    query.
+    """
     description = "Latest feedback"
+    num_items = 10
+
+    def __call__(self, request, *args, **kwargs):
+        vary_on = [kwargs.get(name, 'all') for name in
+                   ('list', 'type', 'status')]
+        etag = make_etag(
+            get_versions('feeds', 'taxonomy'), get_language(), *vary_on)
+        view = super(LatestFeedback, self).__call__
+
+        def cached_view(request, *args, **kwargs):
+            key = make_key('feed', etag)
+            cached = cache.get(key)
+            count_cache(cached is not None)
+            if cached is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cached = (response.content, response['Content-Type'])
+                cache.set(key, cached, get_timeout())
+
+            return HttpResponse(cached[0], content_type=cached[1])
+
+        return condition(etag_func=lambda request, *args, **kwargs: etag)(
+            cached_view)(request, *args, **kwargs)
+
+    def get_object(self, request, list='all', type='all', status='all'):
+        feedback_type = feedback_status = None
+        if type != 'all':
+            feedback_type = type_registry.get(slug=type)
+            if feedback_type is None:
+                raise ObjectDoesNotExist
+        if status != 'all':
+            feedback_status = status_registry.get(slug=status)
+            if feedback_status is None:
+                raise ObjectDoesNotExist
+
+        return {'list': list, 'type': type, 'status': status,
+                'type_object': feedback_type,
+                'status_object': feedback_status}
+
+    def title(self, obj):
+        parts = [_("Feedback")]
+        if obj['list'] == 'open':
+            parts.append(_("Open"))
+        elif obj['list'] == 'closed':
+            parts.append(_("Closed"))
+        for taxonomy in (obj['type_object'], obj['status_object']):
+            if taxonomy is not None:
+                parts.append(taxonomy.title)
+
+        return u' - '.join(parts)
+
+    def link(self, obj):
+        if obj['status'] != 'all':
+            return reverse('djangovoice_list_type_status',
+                           args=[obj['list'], obj['type'], obj['status']])
+        if obj['type'] != 'all':
+            return reverse('djangovoice_list_type',
+                           args=[obj['list'], obj['type']])
+
+        return reverse('djangovoice_list', args=[obj['list']])
 
-    def items(self):
-        return Feedback.objects.filter(private=False).order_by('-created')[:10]
+    def items(self, obj):
+        return Feedback.objects.filter_list(
+            AnonymousUser(), obj['list'], obj['type'], obj['status']
+        ).order_by('-created', '-id')[:self.num_items]
@@ -0,0 +1,158 @@
+"""
+Bulk import of feedback from CSV or JSON lines, the formats written by
+djangovoice.export.
+
+Rows are read lazily and inserted with Feedback.objects.bulk_ingest, one
+transaction per chunk. Types and statuses are resolved by slug from the
+registries and owners by username with one query per chunk. The number
+of consumed rows is saved in a Checkpoint row in the same transaction as
+each chunk, so an interrupted import skips exactly what is already in
+the database when it runs again.
+"""
+import csv
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import simplejson as json
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.hashcompat import md5_constructor
+from djangovoice.models import Checkpoint, Feedback, status_registry, \
+    type_registry
+from djangovoice.utils import auto_now_add_disabled, chunked
+
+FORMATS = ('csv', 'jsonl')
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+class InvalidImport(ValueError):
+    pass
+
+
+def csv_rows(source):
+    for row in csv.DictReader(source):
+        yield dict((field, value.decode('utf-8'))
+                   for field, value in row.iteritems() if field)
+
+
+def jsonl_rows(source):
+    for line in source:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_rows(source, format='csv'):
+    if format == 'csv':
+        return csv_rows(source)
+    if format == 'jsonl':
+        return jsonl_rows(source)
+
+    raise InvalidImport("Unknown import format: %s" % format)
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+
+    return unicode(value or '').strip().lower() in TRUE_VALUES
+
+
+def parse_created(value, line):
+    if not value:
+        return None
+
+    created = parse_datetime(unicode(value))
+    if created is None:
+        raise InvalidImport("Row %d: invalid date %r." % (line, value))
+    if settings.USE_TZ and timezone.is_naive(created):
+        created = timezone.make_aware(
+            created, timezone.get_default_timezone())
+
+    return created
+
+
+def build_feedback(row, line, users):
+    """
+    An unsaved Feedback from an import row. users maps the usernames of
+    the chunk to user ids.
+    """
+    feedback_type = type_registry.get(slug=row.get('type'))
+    if feedback_type is None:
+        raise InvalidImport(
+            "Row %d: unknown type %r." % (line, row.get('type')))
+
+    status_id = None
+    if row.get('status'):
+        status = status_registry.get(slug=row['status'])
+        if status is None:
+            raise InvalidImport(
+                "Row %d: unknown status %r." % (line, row['status']))
+        status_id = status.pk
+
+    title = row.get('title')
+    if not title:
+        raise InvalidImport("Row %d: title is required." % line)
+
+    return Feedback(
+        type_id=feedback_type.pk,
+        status_id=status_id,
+        title=title,
+        description=row.get('description') or '',
+        private=parse_bool(row.get('private')),
+        anonymous=parse_bool(row.get('anonymous')),
+        user_id=users.get(row.get('user')),
+        email=row.get('email') or None,
+        slug=row.get('slug') or None,
+        created=parse_created(row.get('created'), line))
+
+
+def checkpoint_name(source_name):
+    return 'import:%s' % md5_constructor(
+        source_name.encode('utf-8')).hexdigest()
+
+
+def reset_checkpoint(source_name):
+    Checkpoint.objects.filter(name=checkpoint_name(source_name)).delete()
+
+
+def import_feedback(rows, chunk_size=1000, checkpoint=None, progress=None):
+    """
+    Insert feedback rows in chunks and return (skipped, inserted): rows
+    skipped because the checkpoint says they were imported already, and
+    rows inserted now. checkpoint names the source, e.g. the path of the
+    imported file; without it nothing is skipped or recorded. progress,
+    if given, is called with the total of consumed rows after each chunk.
+    """
+    state = {'done': 0}
+    if checkpoint:
+        name = checkpoint_name(checkpoint)
+        state['done'] = Checkpoint.objects.get_or_create(
+            name=name)[0].position
+    skipped = state['done']
+    inserted = 0
+
+    def record(chunk):
+        state['done'] += len(chunk)
+        if checkpoint:
+            Checkpoint.objects.filter(name=name).update(
+                position=state['done'])
+
+    # Keep the timestamps of the source.
+    with auto_now_add_disabled(Feedback):
+        for chunk in chunked(islice(rows, skipped, None), chunk_size):
+            usernames = set(row['user'] for row in chunk if row.get('user'))
+            users = dict(User.objects.filter(
+                username__in=usernames).values_list('username', 'id'))
+            feedback = [build_feedback(row, state['done'] + index + 1, users)
+                        for index, row in enumerate(chunk)]
+            for item in feedback:
+                if item.created is None:
+                    item.created = timezone.now()
+
+            inserted += Feedback.objects.bulk_ingest(
+                feedback, chunk_size=len(feedback), on_chunk=record)
+            if progress is not None:
+                progress(state['done'])
+
+    return skipped, inserted
@@ -0,0 +1,276 @@
+"""
+Opt-in instrumentation of djangovoice views and template tags.
+
+Add ``djangovoice.instrumentation.InstrumentationMiddleware`` to
+MIDDLEWARE_CLASSES to record, for every request served by a djangovoice
+view, the number of queries and the time spent in the database, the
+template render time, fragment cache hits and misses, and the same
+figures per template tag (``get_comment_count``, ``scores_for_objects``,
+``get_status_list``, ...). Finished records are handed to the sinks
+listed in VOICE_INSTRUMENTATION_SINKS.
+
+Queries are timed through Django's debug cursor, which the middleware
+turns on for instrumented requests only.
+"""
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+from django.template.base import InvalidTemplateLibrary, get_library
+from django.utils import simplejson as json
+from django.utils.importlib import import_module
+
+INSTRUMENTED_LIBRARIES = (
+    'djangovoice_tags', 'get_status_menu', 'get_type_menu', 'comments',
+    'voting_tags', 'gravatar',
+)
+
+_state = threading.local()
+
+
+class Record(object):
+    def __init__(self, request):
+        self.request = request
+        self.view = None
+        self.started = time.time()
+        self.first_query = len(connection.queries)
+        self.render_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.tags = {}
+
+    @contextmanager
+    def measure_tag(self, name):
+        first_query = len(connection.queries)
+        started = time.time()
+        try:
+            yield
+        finally:
+            stats = self.tags.setdefault(
+                name, {'calls': 0, 'ms': 0.0, 'queries': 0, 'db_ms': 0.0})
+            queries = connection.queries[first_query:]
+            stats['calls'] += 1
+            stats['ms'] += (time.time() - started) * 1000
+            stats['queries'] += len(queries)
+            stats['db_ms'] += query_time(queries)
+
+    def finish(self, response):
+        queries = connection.queries[self.first_query:]
+
+        return {
+            'view': self.view,
+            'method': self.request.method,
+            'path': self.request.path,
+            'status': response.status_code,
+            'ms': round((time.time() - self.started) * 1000, 3),
+            'queries': len(queries),
+            'db_ms': round(query_time(queries), 3),
+            'render_ms': round(self.render_ms, 3),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'tags': dict(
+                (name, dict((key, round(value, 3))
+                            for key, value in stats.items()))
+                for name, stats in self.tags.items()),
+        }
+
+
+def query_time(queries):
+    return sum(float(query['time']) for query in queries) * 1000
+
+
+def current():
+    return getattr(_state, 'record', None)
+
+
+def count_cache(hit):
+    """
+    Count a fragment cache hit or miss of the current request.
+    """
+    record = current()
+    if record is not None:
+        if hit:
+            record.cache_hits += 1
+        else:
+            record.cache_misses += 1
+
+
+def instrument_tag(name, compile_function):
+    def compile(parser, token):
+        node = compile_function(parser, token)
+        render = node.render
+
+        def instrumented_render(context):
+            record = current()
+            if record is None:
+                return render(context)
+            with record.measure_tag(name):
+                return render(context)
+
+        node.render = instrumented_render
+        return node
+
+    compile.instrumented = True
+
+    return compile
+
+
+def install():
+    """
+    Wrap the tags of INSTRUMENTED_LIBRARIES so that their rendering is
+    measured. Templates compiled before the first instrumented request
+    are not affected.
+    """
+    if getattr(install, 'done', False):
+        return
+
+    for name in INSTRUMENTED_LIBRARIES:
+        try:
+            library = get_library(name)
+        except InvalidTemplateLibrary:
+            continue
+        for tag, compile_function in library.tags.items():
+            if not getattr(compile_function, 'instrumented', False):
+                library.tags[tag] = instrument_tag(tag, compile_function)
+
+    install.done = True
+
+
+class LoggingSink(object):
+    """
+    Logs every record as JSON to the djangovoice.instrumentation logger.
+    """
+    logger = logging.getLogger('djangovoice.instrumentation')
+
+    def emit(self, record):
+        self.logger.info(json.dumps(record, separators=(',', ':')))
+
+
+class StatsdSink(object):
+    """
+    Sends timers and counters over UDP in the statsd line format to
+    VOICE_STATSD_ADDRESS, "host:port".
+    """
+
+    def __init__(self):
+        host, port = getattr(
+            settings, 'VOICE_STATSD_ADDRESS', 'localhost:8125').split(':')
+        self.address = (host, int(port))
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def lines(self, record):
+        prefix = 'djangovoice.view.%s' % record['view'].rsplit('.', 1)[-1]
+        yield '%s.requests:1|c' % prefix
+        for key in ('ms', 'db_ms', 'render_ms'):
+            yield '%s.%s:%s|ms' % (prefix, key, record[key])
+        for key in ('queries', 'cache_hits', 'cache_misses'):
+            yield '%s.%s:%d|c' % (prefix, key, record[key])
+        for tag, stats in record['tags'].items():
+            yield 'djangovoice.tag.%s.ms:%s|ms' % (tag, stats['ms'])
+            yield 'djangovoice.tag.%s.queries:%d|c' % (tag, stats['queries'])
+
+    def emit(self, record):
+        try:
+            self.socket.sendto('\n'.join(self.lines(record)), self.address)
+        except socket.error:
+            pass
+
+
+buffer = deque(maxlen=200)
+
+
+class MemorySink(object):
+    """
+    Keeps the latest records in process memory, for the staff-only
+    instrumentation/ view.
+    """
+
+    def emit(self, record):
+        buffer.append(record)
+
+
+def summarize(records):
+    """
+    Request count and mean figures per view of a list of records.
+    """
+    views = {}
+    for record in records:
+        summary = views.setdefault(record['view'], {
+            'requests': 0, 'ms': 0.0, 'queries': 0, 'db_ms': 0.0,
+            'render_ms': 0.0, 'cache_hits': 0, 'cache_misses': 0})
+        summary['requests'] += 1
+        for key in ('ms', 'queries', 'db_ms', 'render_ms', 'cache_hits',
+                    'cache_misses'):
+            summary[key] += record[key]
+
+    for summary in views.values():
+        for key in ('ms', 'queries', 'db_ms', 'render_ms'):
+            summary[key] = round(float(summary[key]) / summary['requests'], 3)
+
+    return views
+
+
+def get_sinks():
+    if not hasattr(get_sinks, 'sinks'):
+        sinks = []
+        for path in getattr(settings, 'VOICE_INSTRUMENTATION_SINKS',
+                            ('djangovoice.instrumentation.LoggingSink',)):
+            module, name = path.rsplit('.', 1)
+            sinks.append(getattr(import_module(module), name)())
+        get_sinks.sinks = sinks
+
+    return get_sinks.sinks
+
+
+def view_name(view_func):
+    name = getattr(view_func, '__name__', view_func.__class__.__name__)
+
+    return '%s.%s' % (view_func.__module__, name)
+
+
+class InstrumentationMiddleware(object):
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Other views on the site are left alone: no record, and no debug
+        # cursor keeping their queries.
+        name = view_name(view_func)
+        if not name.startswith('djangovoice.'):
+            return
+
+        install()
+        record = _state.record = Record(request)
+        record.view = name
+        _state.debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+
+    def process_template_response(self, request, response):
+        record = current()
+        if record is not None:
+            render = response.render
+
+            def timed_render():
+                started = time.time()
+                try:
+                    return render()
+                finally:
+                    record.render_ms += (time.time() - started) * 1000
+
+            response.render = timed_render
+
+        return response
+
+    def process_response(self, request, response):
+        record = current()
+        if record is None:
+            return response
+
+        _state.record = None
+        connection.use_debug_cursor = getattr(_state, 'debug_cursor', None)
+        data = record.finish(response)
+        for sink in get_sinks():
+            sink.emit(data)
+
+        return response
@@ -0,0 +1,78 @@
+from optparse import make_option
+from django.core.management.base import NoArgsCommand
+from django.db import transaction
+from djangovoice.duplicates import bucket_keys, pack, signature, similarity
+from djangovoice.duplicates import unpack
+from djangovoice.models import Feedback, FeedbackBucket, FeedbackSignature
+from djangovoice.utils import chunked, queryset_iterator
+
+
+class Command(NoArgsCommand):
+    help = ("Propose clusters of near-duplicate feedback in one pass over "
+            "the table, optionally storing the signatures.")
+    option_list = NoArgsCommand.option_list + (
+        make_option('--backfill', action='store_true', default=False,
+                    help="Store signatures and buckets of every feedback."),
+        make_option('--threshold', type='float', default=0.5,
+                    help="Minimum estimated similarity of duplicates."),
+        make_option('--chunk-size', type='int', default=1000),
+    )
+
+    def handle_noargs(self, **options):
+        threshold = options['threshold']
+        buckets = {}
+        signatures = {}
+        parents = {}
+
+        def find(pk):
+            while parents[pk] != pk:
+                parents[pk] = parents[parents[pk]]
+                pk = parents[pk]
+            return pk
+
+        feedback = queryset_iterator(
+            Feedback.objects.only('id', 'title', 'description'),
+            options['chunk_size'])
+        for chunk in chunked(feedback, options['chunk_size']):
+            rows = []
+            for item in chunk:
+                minhash = signature(item.title, item.description)
+                keys = bucket_keys(minhash)
+                packed = pack(minhash)
+                rows.append((item, packed, keys))
+
+                signatures[item.pk] = packed
+                parents[item.pk] = item.pk
+                for key in keys:
+                    for other in buckets.setdefault(key, []):
+                        if find(other) != find(item.pk) and similarity(
+                                minhash, unpack(signatures[other])) >= threshold:
+                            parents[find(item.pk)] = find(other)
+                    buckets[key].append(item.pk)
+
+            if options['backfill']:
+                self.store(rows)
+
+        clusters = {}
+        for pk in parents:
+            clusters.setdefault(find(pk), []).append(pk)
+
+        clusters = [sorted(pks) for pks in clusters.values() if len(pks) > 1]
+        for pks in sorted(clusters):
+            self.stdout.write('%s\n' % ' '.join(map(str, pks)))
+
+        if int(options.get('verbosity', 1)) > 1:
+            self.stderr.write('%d duplicate clusters found.\n' % len(clusters))
+
+    @transaction.commit_on_success
+    def store(self, rows):
+        pks = [item.pk for item, packed, keys in rows]
+        FeedbackSignature.objects.filter(feedback__in=pks).delete()
+        FeedbackBucket.objects.filter(feedback__in=pks).delete()
+        FeedbackSignature.objects.bulk_create([
+            FeedbackSignature(feedback=item, minhash=packed)
+            for item, packed, keys in rows])
+        FeedbackBucket.objects.bulk_create([
+            FeedbackBucket(feedback=item, key=key)
+            for item, packed, keys in rows for key in keys])
+
@@ -0,0 +1,35 @@
+import sys
+from optparse import make_option
+from django.core.management.base import NoArgsCommand, CommandError
+from djangovoice.export import FORMATS, export
+
+
+class Command(NoArgsCommand):
+    help = "Stream feedback, votes or comments as CSV or JSON lines."
+    option_list = NoArgsCommand.option_list + (
+        make_option('--kind', default='feedback',
+                    help="What to export: feedback, votes or comments."),
+        make_option('--format', default='csv',
+                    help="Output format: %s." % ', '.join(FORMATS)),
+        make_option('--counts', action='store_true', default=False,
+                    help="Add score, vote and comment counts to feedback."),
+        make_option('--output', default=None,
+                    help="File to write to instead of standard output."),
+        make_option('--chunk-size', type='int', default=1000),
+    )
+
+    def handle_noargs(self, **options):
+        try:
+            lines = export(options['kind'], options['format'],
+                           options['chunk_size'], options['counts'])
+        except ValueError, error:
+            raise CommandError(error)
+
+        output = options['output'] and open(options['output'], 'wb') or \
+            sys.stdout
+        try:
+            for line in lines:
+                output.write(line)
+        finally:
+            if options['output']:
+                output.close()
@@ -0,0 +1,28 @@
+import time
+from optparse import make_option
+from django.core.management.base import NoArgsCommand
+from djangovoice.votes import flush_votes
+
+
+class Command(NoArgsCommand):
+    help = "Apply votes buffered with VOICE_BUFFER_VOTES."
+    option_list = NoArgsCommand.option_list + (
+        make_option('--batch-size', type='int', default=1000),
+        make_option('--loop', action='store_true', default=False,
+                    help="Keep flushing, like a worker process."),
+        make_option('--interval', type='float', default=1.0,
+                    help="Seconds to sleep when the buffer is empty."),
+    )
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+        while True:
+            flushed = flush_votes(options['batch_size'])
+            if flushed and verbosity > 1:
+                self.stdout.write("Flushed %d votes.\n" % flushed)
+
+            if flushed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,53 @@
+import os
+from optparse import make_option
+from django.core.management.base import BaseCommand, CommandError
+from djangovoice.importer import FORMATS, InvalidImport, import_feedback, \
+    read_rows, reset_checkpoint
+
+
+class Command(BaseCommand):
+    args = '<file>'
+    help = ("Import feedback from a CSV or JSON lines file, in chunked "
+            "transactions that can resume after an interruption.")
+    option_list = BaseCommand.option_list + (
+        make_option('--format', default=None,
+                    help="Input format: %s. Guessed from the file extension "
+                         "by default." % ', '.join(FORMATS)),
+        make_option('--chunk-size', type='int', default=1000,
+                    help="Rows inserted per transaction."),
+        make_option('--checkpoint', default=None,
+                    help="Name of the checkpoint that records the progress. "
+                         "Defaults to the absolute path of <file>."),
+        make_option('--restart', action='store_true', default=False,
+                    help="Forget the checkpoint and import every row."),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("Usage: djangovoice_import %s" % self.args)
+
+        path = os.path.abspath(args[0])
+        format = options['format'] or os.path.splitext(path)[1].lstrip('.')
+        checkpoint = options['checkpoint'] or path
+        if options['restart']:
+            reset_checkpoint(checkpoint)
+        verbose = int(options.get('verbosity', 1)) > 0
+
+        def progress(rows):
+            if verbose:
+                self.stdout.write("%d rows imported.\n" % rows)
+
+        try:
+            with open(path, 'rb') as source:
+                skipped, inserted = import_feedback(
+                    read_rows(source, format), options['chunk_size'],
+                    checkpoint, progress)
+        except (IOError, InvalidImport), error:
+            raise CommandError(error)
+
+        if verbose:
+            self.stdout.write(
+                "Imported %d feedback, skipped %d already imported rows. "
+                "Run djangovoice_rebuild_search_index and "
+                "djangovoice_duplicates --backfill to index them.\n" % (
+                    inserted, skipped))
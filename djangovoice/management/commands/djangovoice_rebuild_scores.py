@@ -0,0 +1,25 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import NoArgsCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from voting.models import Vote
+from djangovoice.models import Feedback
+
+
+class Command(NoArgsCommand):
+    help = "Rebuild denormalized feedback scores from the vote table."
+
+    @transaction.commit_on_success
+    def handle_noargs(self, **options):
+        content_type = ContentType.objects.get_for_model(Feedback)
+        scores = Vote.objects.filter(content_type=content_type).values(
+            'object_id').annotate(score=Sum('vote'), num_votes=Count('id'))
+
+        Feedback.objects.update(score=0, num_votes=0)
+        updated = 0
+        for row in scores.order_by():
+            updated += Feedback.objects.filter(pk=row['object_id']).update(
+                score=row['score'], num_votes=row['num_votes'])
+
+        if int(options.get('verbosity', 1)) > 0:
+            self.stdout.write("Rebuilt scores for %d feedback.\n" % updated)
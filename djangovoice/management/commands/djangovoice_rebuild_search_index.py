@@ -0,0 +1,15 @@
+from django.core.management.base import NoArgsCommand
+from django.db import transaction
+from djangovoice.models import Feedback
+from djangovoice.search import get_backend
+
+
+class Command(NoArgsCommand):
+    help = "Rebuild the full-text search index of feedback."
+
+    @transaction.commit_on_success
+    def handle_noargs(self, **options):
+        get_backend().rebuild(Feedback.objects.all())
+
+        if int(options.get('verbosity', 1)) > 0:
+            self.stdout.write("Search index rebuilt.\n")
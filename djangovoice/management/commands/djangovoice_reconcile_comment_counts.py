@@ -0,0 +1,22 @@
+from optparse import make_option
+from django.core.management.base import NoArgsCommand
+from djangovoice.caching import bump_version
+from djangovoice.models import Feedback
+
+
+class Command(NoArgsCommand):
+    help = ("Repair denormalized feedback comment counts that drifted from "
+            "the comments table.")
+    option_list = NoArgsCommand.option_list + (
+        make_option('--chunk-size', type='int', default=1000),
+    )
+
+    def handle_noargs(self, **options):
+        repaired = Feedback.objects.reconcile_comment_counts(
+            options['chunk_size'])
+        if repaired:
+            bump_version('feedback')
+
+        if int(options.get('verbosity', 1)) > 0:
+            self.stdout.write(
+                "Repaired comment counts of %d feedback.\n" % repaired)
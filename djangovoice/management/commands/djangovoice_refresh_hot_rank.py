@@ -0,0 +1,58 @@
+from optparse import make_option
+from django.core.management.base import NoArgsCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from djangovoice.caching import bump_version
+from djangovoice.models import Checkpoint, Feedback, compute_hot_rank
+from djangovoice.utils import chunked, queryset_iterator
+
+CHECKPOINT_NAME = 'hot_rank'
+
+
+class Command(NoArgsCommand):
+    help = ("Refresh the hot ranking of feedback whose votes or comments "
+            "changed since the last run.")
+    option_list = NoArgsCommand.option_list + (
+        make_option('--full', action='store_true', default=False,
+                    help="Refresh every feedback."),
+        make_option('--chunk-size', type='int', default=1000),
+    )
+
+    def handle_noargs(self, **options):
+        started = timezone.now()
+        checkpoint, created = Checkpoint.objects.get_or_create(
+            name=CHECKPOINT_NAME)
+        feedback = Feedback.objects.only(
+            'id', 'score', 'comment_count', 'created')
+        if checkpoint.timestamp is not None and not options['full']:
+            feedback = feedback.filter(modified__gte=checkpoint.timestamp)
+
+        updated = 0
+        for chunk in chunked(queryset_iterator(
+                feedback, options['chunk_size']), options['chunk_size']):
+            updated += self.refresh(chunk, started)
+
+        Checkpoint.objects.filter(name=CHECKPOINT_NAME).update(
+            timestamp=started)
+        if updated:
+            bump_version('feedback')
+
+        if int(options.get('verbosity', 1)) > 0:
+            self.stdout.write("Refreshed hot rank of %d feedback.\n" % updated)
+
+    @transaction.commit_on_success
+    def refresh(self, chunk, now):
+        # One UPDATE ... CASE per chunk. Ids and ranks are numbers, so they
+        # are inlined rather than passed as parameters, which also keeps
+        # large chunks under SQLite's limit of 999 parameters.
+        ranks = [(int(item.pk), compute_hot_rank(
+                    item.score, item.comment_count, item.created or now))
+                 for item in chunk]
+        connection.cursor().execute(
+            'UPDATE %s SET hot_rank = CASE id %s END WHERE id IN (%s)' % (
+                connection.ops.quote_name(Feedback._meta.db_table),
+                ' '.join(['WHEN %d THEN %.7f' % rank for rank in ranks]),
+                ', '.join(['%d' % pk for pk, rank in ranks])))
+        transaction.set_dirty()
+
+        return len(chunk)
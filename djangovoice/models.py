@@ -1,7 +1,16 @@
-from django.db import models
+import calendar
+import math
+import uuid
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.query import QuerySet
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.utils.translation import pgettext
 from django.utils.translation import ugettext_lazy as _
+from djangovoice.caching import bump_version
+from djangovoice.registry import ModelRegistry
+from djangovoice.utils import chunked, queryset_iterator
 
 STATUS_CHOICES = (
     ('open', pgettext('status', "Open")),
@@ -19,16 +28,15 @@ class Status(models.Model):
         max_length=10, choices=STATUS_CHOICES, default=STATUS_CHOICES[0][0])
 
     def save(self, **kwargs):
-        if self.default:
-            try:
-                default_project = Status.objects.get(default=True)
-                default_project.default = False
-                default_project.save()
+        # One UPDATE unsets the previous default. A partial unique index
+        # (migration 0012) makes concurrent switches fail instead of
+        # leaving two defaults.
+        with transaction.commit_on_success():
+            if self.default:
+                Status.objects.filter(default=True).exclude(
+                    pk=self.pk).update(default=False)
 
-            except Status.DoesNotExist:
-                pass
-
-        super(Status, self).save(**kwargs)
+            super(Status, self).save(**kwargs)
 
     def __unicode__(self):
         return unicode(self.title)
@@ -46,6 +54,276 @@ class Type(models.Model):
         return self.title
 
 
+class StatusRegistry(ModelRegistry):
+    def get_default(self):
+        """
+        The status new feedback gets: the one marked as default, otherwise
+        the first one.
+        """
+        default = self.get(default=True)
+        if default is None:
+            default = self.all()[0]
+
+        return default
+
+
+class TypeRegistry(ModelRegistry):
+    def get_default(self):
+        """
+        The type preselected in the widget: the one whose slug is the
+        VOICE_DEFAULT_TYPE setting, otherwise the first one. None when
+        there are no types yet.
+        """
+        from django.conf import settings
+
+        slug = getattr(settings, 'VOICE_DEFAULT_TYPE', None)
+        default = slug and self.get(slug=slug)
+        if not default and self.all():
+            default = self.all()[0]
+
+        return default or None
+
+
+status_registry = StatusRegistry(Status)
+type_registry = TypeRegistry(Type)
+
+
+def generate_slug():
+    return uuid.uuid1().hex[:10]
+
+VOTE_DIRECTIONS = {'up': 1, 'down': -1, 'clear': 0}
+
+# "Hot" ranking: log10 of the points plus the creation time, so ten times
+# the points are worth HOT_RANK_PERIOD seconds of age. The rank of an
+# item only changes when its votes or comments change, which is what lets
+# djangovoice_refresh_hot_rank work incrementally.
+HOT_RANK_EPOCH = 1134028003
+HOT_RANK_PERIOD = 45000.0
+HOT_RANK_COMMENT_WEIGHT = 1
+
+
+def compute_hot_rank(score, comment_count, created):
+    points = score + HOT_RANK_COMMENT_WEIGHT * comment_count
+    order = math.log10(max(abs(points), 1))
+    sign = points > 0 and 1 or points < 0 and -1 or 0
+    seconds = calendar.timegm(created.utctimetuple()) - HOT_RANK_EPOCH
+
+    return round(sign * order + seconds / HOT_RANK_PERIOD, 7)
+
+
+class FeedbackManager(models.Manager):
+    def bulk_ingest(self, feedback, chunk_size=1000, on_chunk=None):
+        """
+        Insert an iterable of unsaved feedback with bulk_create, one
+        transaction per chunk. Defaults that Feedback.save and the submit
+        view would set are assigned here, without a query per row.
+        on_chunk, if given, is called with each chunk inside its
+        transaction, e.g. to record progress atomically. bulk_create sends
+        no post_save, so the feedback and feeds cache versions are bumped
+        here instead. Returns the number of inserted feedback.
+        """
+        default_status = status_registry.get_default()
+        count = 0
+        try:
+            for chunk in chunked(feedback, chunk_size):
+                for item in chunk:
+                    if item.status_id is None:
+                        item.status = default_status
+                    if item.user_id is None and not item.slug:
+                        item.slug = generate_slug()
+                    item.hot_rank = compute_hot_rank(
+                        item.score, 0, item.created or timezone.now())
+
+                with transaction.commit_on_success():
+                    self.bulk_create(chunk)
+                    if on_chunk is not None:
+                        on_chunk(chunk)
+                count += len(chunk)
+        finally:
+            if count:
+                bump_version('feedback', 'feeds')
+
+        return count
+
+    def bulk_update_status(self, feedback, status):
+        """
+        Move the given feedback, a queryset or primary keys, to status in
+        one UPDATE and send a single feedback_bulk_updated signal. Returns
+        the number of updated rows.
+        """
+        return self.bulk_update(feedback, status=status)
+
+    def mark_duplicates(self, feedback, original):
+        """
+        Mark the given feedback, a queryset or primary keys, as duplicates
+        of original in one UPDATE and send a single feedback_bulk_updated
+        signal. Returns the number of updated rows.
+        """
+        if isinstance(feedback, QuerySet):
+            feedback = feedback.exclude(pk=original.pk)
+        else:
+            feedback = [pk for pk in feedback if int(pk) != original.pk]
+
+        return self.bulk_update(feedback, duplicate=original)
+
+    def bulk_update(self, feedback, **changes):
+        """
+        Apply changes to the given feedback, a queryset or primary keys, in
+        one UPDATE and send a single feedback_bulk_updated signal. A
+        queryset is updated as it is, without loading its rows. Returns
+        the number of updated rows.
+        """
+        from djangovoice.signals import feedback_bulk_updated
+
+        if isinstance(feedback, QuerySet):
+            queryset, pks = feedback, None
+        else:
+            pks = list(feedback)
+            if not pks:
+                return 0
+            queryset = self.filter(pk__in=pks)
+
+        with transaction.commit_on_success():
+            updated = queryset.update(modified=timezone.now(), **changes)
+
+        if updated:
+            feedback_bulk_updated.send(
+                sender=self.model, pks=pks, changes=changes)
+
+        return updated
+
+    def filter_list(self, user, feedback_list='open', feedback_type='all',
+                    feedback_status='all'):
+        """
+        Feedback shown by a list page. Statuses and types come from the
+        in-process registries, so the list is filtered on foreign key ids
+        without joining their tables.
+        """
+        feedback = self.all()
+        status_filter = {}
+        if feedback_list in ('open', 'closed'):
+            status_filter['status'] = feedback_list
+        elif feedback_list == 'mine':
+            feedback = feedback.filter(user=user)
+
+        if feedback_status != 'all':
+            status_filter['slug'] = feedback_status
+
+        if status_filter:
+            feedback = feedback.filter(
+                status__in=status_registry.pks(**status_filter))
+
+        if feedback_type != 'all':
+            feedback = feedback.filter(
+                type__in=type_registry.pks(slug=feedback_type))
+
+        # If user is checking his own feedback, do not filter by private
+        if not user.is_staff and feedback_list != 'mine':
+            feedback = feedback.filter(private=False)
+
+        return feedback
+
+    def record_vote(self, feedback, user, vote):
+        """
+        Record user's vote on feedback and update the denormalized score and
+        num_votes columns in the same transaction. The feedback row is
+        locked first, so concurrent votes of the same user are applied one
+        after the other, each against the vote stored by the previous one.
+        """
+        from voting.models import Vote
+
+        with transaction.commit_on_success():
+            list(self.select_for_update().filter(
+                pk=feedback.pk).values_list('pk', flat=True))
+            previous = Vote.objects.get_for_user(feedback, user)
+            previous_vote = previous and previous.vote or 0
+            Vote.objects.record_vote(feedback, user, vote)
+
+            score_delta = vote - previous_vote
+            votes_delta = int(vote != 0) - int(previous_vote != 0)
+            if score_delta or votes_delta:
+                self.filter(pk=feedback.pk).update(
+                    score=F('score') + score_delta,
+                    num_votes=F('num_votes') + votes_delta,
+                    modified=timezone.now())
+
+    def comment_counts(self, pks=None):
+        """
+        Public comment counts of the given feedback, or of all feedback,
+        in one grouped query.
+        """
+        from django.conf import settings
+        from django.contrib import comments
+        from django.contrib.contenttypes.models import ContentType
+        from django.db.models import Count
+
+        content_type = ContentType.objects.get_for_model(self.model)
+        comment_list = comments.get_model().objects.filter(
+            content_type=content_type,
+            site__pk=settings.SITE_ID,
+            is_public=True,
+            is_removed=False)
+        if pks is not None:
+            comment_list = comment_list.filter(
+                object_pk__in=[unicode(pk) for pk in pks])
+        counts = comment_list.values_list('object_pk').annotate(
+            Count('pk')).order_by()
+
+        return dict((int(pk), count) for pk, count in counts
+                    if pk.isdigit())
+
+    def reconcile_comment_counts(self, chunk_size=1000):
+        """
+        Repair drift of the comment_count column: count the comments of
+        all feedback in one grouped query, then update only the rows that
+        differ, with one update per distinct count. Returns the number of
+        repaired feedback.
+        """
+        counts = self.comment_counts()
+        drifted = {}
+        stored = self.only('id', 'comment_count')
+        for feedback in queryset_iterator(stored, chunk_size):
+            count = counts.get(feedback.pk, 0)
+            if count != feedback.comment_count:
+                drifted.setdefault(count, []).append(feedback.pk)
+
+        for count, pks in drifted.items():
+            for chunk in chunked(pks, chunk_size):
+                with transaction.commit_on_success():
+                    self.filter(pk__in=chunk).update(
+                        comment_count=count, modified=timezone.now())
+
+        return sum(len(pks) for pks in drifted.values())
+
+    def fill_page(self, feedback_list, user):
+        """
+        Attach everything list.html needs to a page of feedback: type and
+        status from the registries and the vote of user. Costs one query
+        for the votes, whatever the page size. Expects the user relation
+        to be selected already.
+        """
+        from voting.models import Vote
+
+        if not feedback_list:
+            return feedback_list
+
+        votes = {}
+        if user.is_authenticated():
+            votes = Vote.objects.get_for_user_in_bulk(feedback_list, user)
+
+        for feedback in feedback_list:
+            feedback_type = type_registry.get(pk=feedback.type_id)
+            if feedback_type is not None:
+                feedback.type = feedback_type
+            status = status_registry.get(pk=feedback.status_id)
+            if status is not None:
+                feedback.status = status
+            vote = votes.get(feedback.pk)
+            feedback.user_vote = vote and vote.vote or 0
+
+        return feedback_list
+
+
 class Feedback(models.Model):
     type = models.ForeignKey(Type, verbose_name=_("Type"))
     title = models.CharField(max_length=500, verbose_name=_("Title"))
@@ -69,24 +347,28 @@ class Feedback(models.Model):
                     'Alternatively you can bookmark next page and check'\
                     'out for an answer later.')
         )
-    slug = models.SlugField(max_length=10, blank=True, null=True)
+    slug = models.SlugField(
+        max_length=10, blank=True, null=True, db_index=True)
     created = models.DateTimeField(auto_now_add=True, blank=True, null=True)
+    modified = models.DateTimeField(
+        auto_now=True, blank=True, null=True, db_index=True)
     status = models.ForeignKey(Status, verbose_name=_('Status'))
     duplicate = models.ForeignKey(
         'self', null=True, blank=True, verbose_name=_("Duplicate"))
+    score = models.IntegerField(default=0, editable=False)
+    num_votes = models.PositiveIntegerField(default=0, editable=False)
+    hot_rank = models.FloatField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
 
-    def save(self, **kwargs):
-        try:
-            self.status
-
-        except Status.DoesNotExist:
-            try:
-                default = Status.objects.get(default=True)
+    objects = FeedbackManager()
 
-            except Status.DoesNotExist:
-                default = Status.objects.all()[0]
+    def save(self, **kwargs):
+        if self.status_id is None:
+            self.status = status_registry.get_default()
 
-            self.status = default
+        if self.pk is None:
+            self.hot_rank = compute_hot_rank(
+                self.score, 0, self.created or timezone.now())
 
         super(Feedback, self).save(**kwargs)
 
@@ -100,3 +382,49 @@ class Feedback(models.Model):
     class Meta:
         verbose_name = _("feedback")
         verbose_name_plural = _("feedback")
+
+
+class FeedbackSignature(models.Model):
+    """
+    MinHash signature of a feedback's title and description, used by
+    djangovoice.duplicates to estimate similarity.
+    """
+    feedback = models.OneToOneField(
+        Feedback, primary_key=True, related_name='signature')
+    minhash = models.TextField()
+
+
+class FeedbackBucket(models.Model):
+    """
+    One LSH band of a signature. Feedback sharing a bucket key are
+    candidate duplicates.
+    """
+    feedback = models.ForeignKey(Feedback, related_name='buckets')
+    key = models.CharField(max_length=16, db_index=True)
+
+
+class PendingVote(models.Model):
+    """
+    Append-only buffer of votes waiting for djangovoice.votes.flush_votes,
+    used when VOICE_BUFFER_VOTES is set.
+    """
+    user = models.ForeignKey(User)
+    feedback = models.ForeignKey(Feedback)
+    vote = models.SmallIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+
+class Checkpoint(models.Model):
+    """
+    Progress of a resumable job, e.g. the last run of
+    djangovoice_refresh_hot_rank or the rows consumed by an import. Kept
+    in the database, so it survives cache restarts and is committed
+    together with the work it records.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    position = models.BigIntegerField(default=0)
+    timestamp = models.DateTimeField(blank=True, null=True)
+
+
+# connect signal receivers
+import djangovoice.signals
@@ -0,0 +1,61 @@
+import time
+from django.core.signals import request_started
+from django.db.models.signals import post_delete, post_save
+from djangovoice.caching import bump_version, get_version
+
+
+class ModelRegistry(object):
+    """
+    In-process copy of a small table that rarely changes, like statuses
+    and types. Rows are loaded once and reloaded after a save or delete.
+    A version number kept in the cache tells the other processes to reload.
+    It is read once per request, and at most every check_interval seconds
+    outside of requests, so lookups are answered from memory.
+    """
+    check_interval = 5
+
+    def __init__(self, model):
+        self.model = model
+        self.namespace = 'registry:%s' % model._meta.db_table
+        self._rows = None
+        self._version = None
+        self._checked = None
+
+        post_save.connect(self.invalidate, sender=model, weak=False)
+        post_delete.connect(self.invalidate, sender=model, weak=False)
+        request_started.connect(self.expire, weak=False)
+
+    def invalidate(self, **kwargs):
+        self._rows = None
+        self._checked = None
+        bump_version(self.namespace)
+
+    def expire(self, **kwargs):
+        self._checked = None
+
+    def all(self):
+        now = time.time()
+        if self._checked is None or now - self._checked > self.check_interval:
+            version = get_version(self.namespace)
+            if version != self._version:
+                self._rows = None
+                self._version = version
+            self._checked = now
+
+        if self._rows is None:
+            self._rows = list(self.model._default_manager.all())
+
+        return self._rows
+
+    def filter(self, **attrs):
+        return [row for row in self.all()
+                if all(getattr(row, name) == value
+                       for name, value in attrs.items())]
+
+    def pks(self, **attrs):
+        return [row.pk for row in self.filter(**attrs)]
+
+    def get(self, **attrs):
+        rows = self.filter(**attrs)
+
+        return rows and rows[0] or None
@@ -0,0 +1,159 @@
+"""
+Full-text search over feedback titles and descriptions.
+
+The backend is chosen with the VOICE_SEARCH_BACKEND setting (a dotted
+path to a backend class). By default the backend matches the database:
+SQLite FTS5, PostgreSQL text search, or a plain icontains scan elsewhere.
+"""
+from django.conf import settings
+from django.db import connection
+from django.utils.importlib import import_module
+
+_backend = None
+
+
+class BaseSearchBackend(object):
+    """
+    A backend filters and ranks an already visibility-filtered feedback
+    queryset. Backends that keep their own index also receive every saved
+    and deleted feedback.
+    """
+
+    def setup(self):
+        pass
+
+    def update(self, feedback):
+        pass
+
+    def remove(self, pk):
+        pass
+
+    def rebuild(self, queryset):
+        for feedback in queryset.iterator():
+            self.update(feedback)
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    def search(self, queryset, query):
+        from django.db.models import Q
+
+        for term in query.split():
+            queryset = queryset.filter(
+                Q(title__icontains=term) | Q(description__icontains=term))
+
+        return queryset.order_by('-created', '-id')
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    Keeps an FTS5 table whose rowid is the feedback id, updated
+    incrementally from the save and delete signals. Ranked by bm25. The
+    table is created by migration 0006; when it is missing, e.g. because
+    SQLite is built without FTS5, it falls back to SimpleSearchBackend.
+    """
+    table = 'djangovoice_feedback_fts'
+
+    def __init__(self):
+        self.available = None
+
+    def setup(self):
+        # Only a query: DDL here would make sqlite3 commit the transaction
+        # of the current request.
+        cursor = connection.cursor()
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [self.table])
+        self.available = cursor.fetchone() is not None
+
+    def is_available(self):
+        if self.available is None:
+            self.setup()
+
+        return self.available
+
+    def update(self, feedback):
+        if not self.is_available():
+            return
+
+        cursor = connection.cursor()
+        cursor.execute(
+            'DELETE FROM %s WHERE rowid = %%s' % self.table, [feedback.pk])
+        cursor.execute(
+            'INSERT INTO %s (rowid, title, description) '
+            'VALUES (%%s, %%s, %%s)' % self.table,
+            [feedback.pk, feedback.title, feedback.description])
+
+    def remove(self, pk):
+        if self.is_available():
+            connection.cursor().execute(
+                'DELETE FROM %s WHERE rowid = %%s' % self.table, [pk])
+
+    def rebuild(self, queryset):
+        if self.is_available():
+            connection.cursor().execute('DELETE FROM %s' % self.table)
+            super(SQLiteSearchBackend, self).rebuild(queryset)
+
+    def search(self, queryset, query):
+        if not self.is_available():
+            return SimpleSearchBackend().search(queryset, query)
+
+        # Quote every term so user input can't use the FTS5 query syntax.
+        match = ' '.join(['"%s"' % term.replace('"', '""')
+                          for term in query.split()])
+
+        return queryset.extra(
+            tables=[self.table],
+            where=['%s.rowid = djangovoice_feedback.id' % self.table,
+                   '%s MATCH %%s' % self.table],
+            params=[match],
+            select={'rank': 'bm25(%s)' % self.table},
+            order_by=['rank'])
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Uses to_tsvector over title and description. Migration 0006 adds a
+    GIN index on the same expression, so there is nothing to sync.
+    """
+    config = 'english'
+    document = ("to_tsvector('%s', djangovoice_feedback.title || ' ' || "
+                "djangovoice_feedback.description)")
+
+    def search(self, queryset, query):
+        document = self.document % self.config
+
+        return queryset.extra(
+            where=["%s @@ plainto_tsquery('%s', %%s)" % (
+                document, self.config)],
+            params=[query],
+            select={'rank': "ts_rank(%s, plainto_tsquery('%s', %%s))" % (
+                document, self.config)},
+            select_params=[query],
+            order_by=['-rank'])
+
+
+def default_backend_path():
+    if connection.vendor == 'sqlite':
+        return 'djangovoice.search.SQLiteSearchBackend'
+    if connection.vendor == 'postgresql':
+        return 'djangovoice.search.PostgresSearchBackend'
+
+    return 'djangovoice.search.SimpleSearchBackend'
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'VOICE_SEARCH_BACKEND', None) or \
+            default_backend_path()
+        module, name = path.rsplit('.', 1)
+        _backend = getattr(import_module(module), name)()
+
+    return _backend
+
+
+def search(queryset, query):
+    return get_backend().search(queryset, query)
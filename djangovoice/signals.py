@@ -0,0 +1,139 @@
+"""
+Signals and signal receivers of djangovoice. Imported at the bottom of
+models.py so they are connected as soon as the app is loaded.
+"""
+from django.contrib import comments
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.comments.signals import comment_was_posted
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal
+from django.utils import timezone
+from voting.models import Vote
+from djangovoice.caching import BULK_NAMESPACE, bump_version, \
+    feedback_namespace
+from djangovoice.duplicates import update_signature
+from djangovoice.models import Feedback, Status, Type
+from djangovoice.search import get_backend as get_search_backend
+
+# Sent once by the set-based updates of FeedbackManager, with the primary
+# keys of the feedback (None when a whole queryset was updated) and the
+# dict of changed fields.
+feedback_bulk_updated = Signal(providing_args=['pks', 'changes'])
+
+
+def is_feedback(instance):
+    content_type = ContentType.objects.get_for_model(Feedback)
+
+    return instance.content_type_id == content_type.pk
+
+
+def feedback_changed(sender, instance, **kwargs):
+    bump_version('feedback', 'feeds', feedback_namespace(instance.pk))
+
+
+def feedback_bulk_changed(sender, pks, **kwargs):
+    # A constant number of cache operations, however many rows changed.
+    bump_version('feedback', 'feeds', BULK_NAMESPACE)
+
+
+def taxonomy_changed(sender, instance, **kwargs):
+    bump_version('taxonomy')
+
+
+def vote_changed(sender, instance, **kwargs):
+    if is_feedback(instance):
+        bump_version('feedback', feedback_namespace(instance.object_id))
+
+
+def comment_changed(sender, instance, **kwargs):
+    if is_feedback(instance):
+        bump_version('feedback', feedback_namespace(instance.object_pk))
+        Feedback.objects.filter(pk=instance.object_pk).update(
+            modified=timezone.now())
+
+
+def is_visible(comment):
+    return comment.is_public and not comment.is_removed
+
+
+def change_comment_count(comment, delta):
+    feedback = Feedback.objects.filter(pk=comment.object_pk)
+    if delta < 0:
+        feedback = feedback.filter(comment_count__gte=-delta)
+    feedback.update(comment_count=F('comment_count') + delta)
+
+
+def remember_comment_visibility(sender, instance, **kwargs):
+    instance._voice_was_visible = instance.pk is not None and \
+        is_visible(instance)
+
+
+def comment_posted(sender, comment, **kwargs):
+    if is_feedback(comment) and is_visible(comment):
+        change_comment_count(comment, 1)
+
+
+def comment_moderated(sender, instance, created=False, **kwargs):
+    # New comments are counted by comment_posted; here only removals,
+    # restorations and approvals of existing comments move the count.
+    was_visible = getattr(instance, '_voice_was_visible', False)
+    instance._voice_was_visible = is_visible(instance)
+    if created or not is_feedback(instance):
+        return
+
+    if was_visible != instance._voice_was_visible:
+        change_comment_count(instance, was_visible and -1 or 1)
+
+
+def comment_deleted(sender, instance, **kwargs):
+    if is_feedback(instance) and getattr(
+            instance, '_voice_was_visible', False):
+        change_comment_count(instance, -1)
+
+
+def update_search_index(sender, instance, **kwargs):
+    get_search_backend().update(instance)
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+def feedback_text(feedback):
+    # Deferred fields are missing from __dict__; reading them would query.
+    return (feedback.__dict__.get('title'),
+            feedback.__dict__.get('description'))
+
+
+def remember_feedback_text(sender, instance, **kwargs):
+    instance._voice_text = feedback_text(instance)
+
+
+def update_duplicate_signature(sender, instance, created=False, raw=False,
+                               **kwargs):
+    # Status changes and other edits keep the signature of the text.
+    text = feedback_text(instance)
+    if not raw and (created or
+                    text != getattr(instance, '_voice_text', None)):
+        update_signature(instance)
+    instance._voice_text = text
+
+
+post_save.connect(update_search_index, sender=Feedback)
+post_init.connect(remember_feedback_text, sender=Feedback)
+post_save.connect(update_duplicate_signature, sender=Feedback)
+post_delete.connect(remove_from_search_index, sender=Feedback)
+comment_was_posted.connect(comment_posted)
+feedback_bulk_updated.connect(feedback_bulk_changed)
+post_init.connect(remember_comment_visibility, sender=comments.get_model())
+post_save.connect(comment_moderated, sender=comments.get_model())
+post_delete.connect(comment_deleted, sender=comments.get_model())
+
+for model, receiver in ((Feedback, feedback_changed),
+                        (Status, taxonomy_changed),
+                        (Type, taxonomy_changed),
+                        (Vote, vote_changed),
+                        (comments.get_model(), comment_changed)):
+    post_save.connect(receiver, sender=model)
+    post_delete.connect(receiver, sender=model)
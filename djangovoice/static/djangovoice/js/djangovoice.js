@@ -1,22 +1,53 @@
-var dv_data = {
-    div: {
-        widget: document.getElementById('djangovoice-widget'),
-        dialogbox: document.getElementById('djangovoice-dialogbox')
+/*
+ * Feedback widget loader. Loaded asynchronously by the djangovoice_widget
+ * template tag; the iframe with the feedback form is only created when the
+ * widget button is clicked for the first time.
+ */
+(function() {
+    var widget = document.getElementById('djangovoice-widget'),
+        dialogbox = document.getElementById('djangovoice-dialogbox'),
+        iframe = null;
+
+    if (!widget || !dialogbox) {
+        return;
     }
-};
 
-var dv_connectSignals = function() {
-    var closeButton = dv_data.div.dialogbox.getElementsByTagName('img')[0];
-    dv_data.div.widget.onclick = function() {
-        if (dv_data.div.dialogbox.style.display === 'block') {
-            dv_data.div.dialogbox.style.display = 'none';
-        } else {
-            dv_data.div.dialogbox.style.display = 'block';
-        }
-    };
-    closeButton.onclick = function() {
-        dv_data.div.dialogbox.style.display = 'none';
+    var createIframe = function() {
+        var closeButton = document.createElement('img');
+
+        iframe = document.createElement('iframe');
+        iframe.id = 'djangovoice-iframe';
+        iframe.src = dialogbox.getAttribute('data-widget-url');
+        iframe.width = '500';
+        iframe.height = '300';
+        iframe.scrolling = 'no';
+        iframe.frameBorder = '0';
+        iframe.setAttribute('allowtransparency', 'true');
+        iframe.style.cssText = 'vertical-align: top; margin-top: 15px; ' +
+            'border-radius: 10px; -moz-border-radius: 10px; ' +
+            '-webkit-border-radius: 10px; box-shadow: 0 0 10px #777; ' +
+            '-moz-box-shadow: 0 0 10px #777; ' +
+            '-webkit-box-shadow: 0 0 10px #777;';
+
+        closeButton.src = dialogbox.getAttribute('data-close-image');
+        closeButton.style.cssText = 'cursor: pointer; margin-left: -30px;';
+        closeButton.onclick = function() {
+            dialogbox.style.display = 'none';
+        };
+
+        dialogbox.appendChild(iframe);
+        dialogbox.appendChild(closeButton);
     };
-};
 
-dv_connectSignals();
\ No newline at end of file
+    widget.onclick = function() {
+        if (dialogbox.style.display === 'block') {
+            dialogbox.style.display = 'none';
+            return;
+        }
+
+        if (iframe === null) {
+            createIframe();
+        }
+        dialogbox.style.display = 'block';
+    };
+})();
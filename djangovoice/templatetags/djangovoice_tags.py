@@ -1,4 +1,9 @@
-from django.template import Library
+from django.core.cache import cache
+from django.template import Library, Node, TemplateSyntaxError, Variable
+from django.utils.translation import get_language
+import djangovoice
+from djangovoice.caching import get_timeout, make_key
+from djangovoice.instrumentation import count_cache
 
 register = Library()
 
@@ -14,6 +19,53 @@ def user_name(user):
 
 @register.inclusion_tag('djangovoice/tags/widget.html', takes_context=True)
 def djangovoice_widget(context):
-    arguments = {'STATIC_URL': context.get('STATIC_URL')}
+    # The version makes the script URL change on every release, so it can
+    # be served with far-future cache headers.
+    arguments = {'STATIC_URL': context.get('STATIC_URL'),
+                 'version': djangovoice.__version__}
 
     return arguments
+
+
+class FragmentCacheNode(Node):
+    def __init__(self, nodelist, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        version = context.get('fragment_cache')
+        if not version:
+            return self.nodelist.render(context)
+
+        vary_on = [version, get_language()]
+        vary_on.extend([var.resolve(context) for var in self.vary_on])
+        key = make_key('fragment:%s' % self.fragment_name, *vary_on)
+        value = cache.get(key)
+        count_cache(value is not None)
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value, get_timeout())
+
+        return value
+
+
+@register.tag
+def fragment_cache(parser, token):
+    """
+    {% fragment_cache name [vary_on ...] %} ... {% endfragment_cache %}
+
+    Like django's cache tag, but keyed on the ``fragment_cache`` context
+    variable set by djangovoice views and on the active language. The
+    variable carries the cache versions the page depends on; when it is
+    empty, the fragment is rendered uncached.
+    """
+    nodelist = parser.parse(('endfragment_cache',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise TemplateSyntaxError(
+            "'%s' tag requires at least 1 argument." % bits[0])
+
+    return FragmentCacheNode(
+        nodelist, bits[1], [Variable(bit) for bit in bits[2:]])
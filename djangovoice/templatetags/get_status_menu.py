@@ -1,4 +1,4 @@
-from djangovoice.models import Status
+from djangovoice.models import status_registry
 from django.template import Library, Variable, TemplateSyntaxError, Node
 
 register = Library()
@@ -9,12 +9,12 @@ class StatusObject(Node):
     
     def render(self, context):
         list = self.list.resolve(context)
-        status_list = Status.objects.all()
+        status_list = status_registry.all()
         
         if list == "open":
-            status_list = status_list.filter(status="open")
+            status_list = status_registry.filter(status="open")
         elif list == "closed":
-            status_list = status_list.filter(status="closed")
+            status_list = status_registry.filter(status="closed")
         
         context['status_list'] = status_list
         return ''
@@ -1,4 +1,4 @@
-from djangovoice.models import Type
+from djangovoice.models import type_registry
 from django.template import Library,Node
 
 register = Library()
@@ -11,7 +11,7 @@ def build_type_list(parser, token):
 
 class TypeObject(Node):
     def render(self, context):
-        context['type_list'] = Type.objects.all()
+        context['type_list'] = type_registry.all()
         return ''
 
 register.tag('get_type_list', build_type_list)
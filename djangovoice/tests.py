@@ -1,8 +1,13 @@
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase
 from django.utils import unittest
 from djangovoice.models import *
+from djangovoice.utils import CursorPaginator
 
 
-class StatusTestCase(models.Model):
+class StatusTestCase(unittest.TestCase):
     def setUp(self):
         self.in_progress = Status.objects.create(
             title='In progress', slug='in_progress', default=False)
@@ -27,6 +32,7 @@ class TypeTestCase(unittest.TestCase):
 
 class FeedbackTestCase(unittest.TestCase):
     def setUp(self):
+        Status.objects.create(title='Open', slug='open', default=True)
         feedback_type = Type.objects.create(title='Bug', slug='bug')
         feedback_user = User.objects.create_user(
             username='djangovoice', email='django@voice.com')
@@ -41,3 +47,646 @@ class FeedbackTestCase(unittest.TestCase):
     def testSpeaking(self):
         default_status = Status.objects.get(default=True)
         self.assertEqual(self.login_form_does_not_work.status, default_status)
+
+
+class CursorPaginatorTestCase(TestCase):
+    def setUp(self):
+        feedback_type = Type.objects.create(title='Idea', slug='idea')
+        Status.objects.create(title='New', slug='new', default=True)
+        for index in range(5):
+            Feedback.objects.create(
+                type=feedback_type, title='Feedback %d' % index)
+
+    def testWalk(self):
+        expected = list(Feedback.objects.order_by(
+            '-created', '-id').values_list('id', flat=True))
+        paginator = CursorPaginator(Feedback.objects.all(), 2)
+
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+
+        seen = [feedback.id for page in pages for feedback in page]
+        self.assertEqual(seen, expected)
+        self.assertFalse(pages[0].has_previous())
+
+        previous = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual([feedback.id for feedback in previous],
+                         [feedback.id for feedback in pages[-2]])
+
+
+class FeedbackListQueriesTestCase(TestCase):
+    def setUp(self):
+        self.feedback_type = Type.objects.create(title='Idea', slug='idea')
+        Status.objects.create(title='New', slug='new', default=True)
+        self.url = reverse('djangovoice_list', args=['all'])
+
+    def create_feedback(self, count):
+        user = User.objects.create_user(
+            username='user%d' % Feedback.objects.count(),
+            email='user@example.com')
+        for index in range(count):
+            Feedback.objects.create(
+                type=self.feedback_type, title='Feedback %d' % index,
+                user=user)
+
+    def count_queries(self):
+        cache.clear()  # render the page instead of the cached fragments
+        connection.use_debug_cursor = True
+        try:
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            return len(connection.queries)
+        finally:
+            connection.use_debug_cursor = None
+
+    def testAnonymousConditionalGet(self):
+        self.create_feedback(1)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def testQueryCountDoesNotGrowWithPageSize(self):
+        self.create_feedback(1)
+        self.count_queries()  # warm up the content type cache
+        one_row = self.count_queries()
+
+        self.create_feedback(9)
+        self.assertEqual(self.count_queries(), one_row)
+
+
+class CommentThreadTestCase(TestCase):
+    def setUp(self):
+        from django.conf import settings
+        from django.contrib import comments
+        from django.contrib.comments.signals import comment_was_posted
+
+        feedback_type = Type.objects.create(title='Idea', slug='idea')
+        Status.objects.create(title='New', slug='new', default=True)
+        self.feedback = Feedback.objects.create(
+            type=feedback_type, title='Discussed')
+        user = User.objects.create_user(
+            username='commenter', email='commenter@example.com')
+        for index in range(3):
+            comment = comments.get_model().objects.create(
+                content_object=self.feedback, site_id=settings.SITE_ID,
+                user=user, comment='Comment %d' % index)
+            comment_was_posted.send(
+                sender=comment.__class__, comment=comment, request=None)
+
+    def testCommentCount(self):
+        self.assertEqual(
+            Feedback.objects.get(pk=self.feedback.pk).comment_count, 3)
+
+    def testModerationAndDeletion(self):
+        from django.contrib import comments
+
+        comment_list = comments.get_model().objects.order_by('id')
+        removed = comment_list[0]
+        removed.is_removed = True
+        removed.save()
+        comment_list[1].delete()
+        self.assertEqual(
+            Feedback.objects.get(pk=self.feedback.pk).comment_count, 1)
+
+        removed.is_removed = False
+        removed.save()
+        self.assertEqual(
+            Feedback.objects.get(pk=self.feedback.pk).comment_count, 2)
+
+    def testReconcile(self):
+        Feedback.objects.filter(pk=self.feedback.pk).update(comment_count=7)
+        self.assertEqual(Feedback.objects.reconcile_comment_counts(), 1)
+        self.assertEqual(
+            Feedback.objects.get(pk=self.feedback.pk).comment_count, 3)
+        self.assertEqual(Feedback.objects.reconcile_comment_counts(), 0)
+
+    def add_comments(self, count):
+        from django.conf import settings
+        from django.contrib import comments
+
+        for index in range(count):
+            user = User.objects.create_user(
+                username='commenter%d' % User.objects.count(),
+                email='commenter@example.com')
+            comments.get_model().objects.create(
+                content_object=self.feedback, site_id=settings.SITE_ID,
+                user=user, comment='More %d' % index)
+
+    def count_queries(self):
+        cache.clear()  # render the page instead of the cached fragments
+        connection.use_debug_cursor = True
+        try:
+            response = self.client.get(self.feedback.get_absolute_url())
+            self.assertEqual(response.status_code, 200)
+            return len(connection.queries)
+        finally:
+            connection.use_debug_cursor = None
+
+    def testAnonymousConditionalGet(self):
+        url = self.feedback.get_absolute_url()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def testQueryCountDoesNotGrowWithComments(self):
+        self.count_queries()  # warm up the content type cache
+        three_comments = self.count_queries()
+
+        self.add_comments(5)
+        self.assertEqual(self.count_queries(), three_comments)
+
+    def testCommentPages(self):
+        from djangovoice.views import FeedbackDetailView
+
+        FeedbackDetailView.comments_per_page = 2
+        try:
+            url = self.feedback.get_absolute_url()
+            response = self.client.get(url)
+            first = response.context['comment_pagination']()
+            self.assertEqual([c.comment for c in first],
+                             ['Comment 0', 'Comment 1'])
+
+            response = self.client.get(
+                url, {'cursor': first.next_cursor})
+            second = response.context['comment_pagination']()
+            self.assertEqual([c.comment for c in second], ['Comment 2'])
+            self.assertFalse(second.has_next())
+        finally:
+            FeedbackDetailView.comments_per_page = 50
+
+
+class WidgetTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('djangovoice_widget')
+
+    def testWithoutTypes(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def testCachedFormGetsFreshCsrfToken(self):
+        from django.test.client import Client
+
+        Type.objects.create(title='Idea', slug='idea')
+        User.objects.create_user('widget', 'widget@example.com', 'widget')
+        self.client.login(username='widget', password='widget')
+        first = self.client.get(self.url)
+
+        other = Client()
+        other.login(username='widget', password='widget')
+        second = other.get(self.url)
+
+        token = second.cookies['csrftoken'].value
+        self.assertTrue(token in second.content)
+        self.assertNotEqual(first.cookies['csrftoken'].value, token)
+        self.assertFalse('csrf-token-placeholder' in second.content)
+
+
+class BulkIngestTestCase(TestCase):
+    def setUp(self):
+        self.feedback_type = Type.objects.create(title='Idea', slug='idea')
+        Status.objects.create(title='Accepted', slug='accepted')
+        self.default = Status.objects.create(
+            title='New', slug='new', default=True)
+
+    def testDefaults(self):
+        count = Feedback.objects.bulk_ingest(
+            (Feedback(type=self.feedback_type, title='Imported %d' % index)
+             for index in range(5)), chunk_size=2)
+
+        self.assertEqual(count, 5)
+        self.assertEqual(
+            Feedback.objects.filter(status=self.default).count(), 5)
+        self.assertEqual(
+            Feedback.objects.filter(slug__isnull=True).count(), 0)
+
+    def testImportResumes(self):
+        from djangovoice.importer import import_feedback
+
+        rows = [{'type': 'idea', 'title': 'Imported %d' % index,
+                 'created': '2012-01-0%dT10:00:00' % (index + 1)}
+                for index in range(5)]
+        self.assertEqual(
+            import_feedback(iter(rows[:3]), 2, 'source'), (0, 3))
+        self.assertEqual(
+            import_feedback(iter(rows), 2, 'source'), (3, 2))
+
+        self.assertEqual(Feedback.objects.count(), 5)
+        self.assertEqual(
+            Feedback.objects.filter(created__year=2012).count(), 5)
+
+
+class DuplicatesTestCase(TestCase):
+    def setUp(self):
+        feedback_type = Type.objects.create(title='Bug', slug='bug')
+        Status.objects.create(title='New', slug='new', default=True)
+        self.login = Feedback.objects.create(
+            type=feedback_type, title='Login form does not work',
+            description='The login form shows an error after submitting.')
+        Feedback.objects.create(
+            type=feedback_type, title='Add dark theme',
+            description='Please add a dark colour scheme.')
+
+    def testFindDuplicates(self):
+        from djangovoice.duplicates import find_duplicates
+
+        candidates = find_duplicates(
+            Feedback.objects.all(), 'Login form does not work!',
+            'The login form shows an error after submitting it.')
+        self.assertEqual([feedback.pk for feedback in candidates],
+                         [self.login.pk])
+
+    def testSignatureFollowsText(self):
+        buckets = lambda: list(FeedbackBucket.objects.filter(
+            feedback=self.login).values_list('id', flat=True))
+        before = buckets()
+
+        feedback = Feedback.objects.get(pk=self.login.pk)
+        feedback.private = True
+        feedback.save()
+        self.assertEqual(buckets(), before)
+
+        feedback.title = 'Login page is broken'
+        feedback.save()
+        self.assertNotEqual(buckets(), before)
+
+
+class VoteTestCase(TestCase):
+    def setUp(self):
+        feedback_type = Type.objects.create(title='Idea', slug='idea')
+        Status.objects.create(title='New', slug='new', default=True)
+        self.feedback = Feedback.objects.create(
+            type=feedback_type, title='Dark theme')
+        self.user = User.objects.create_user(
+            'voter', 'voter@example.com', 'voter')
+
+    def assertScore(self, score, num_votes):
+        feedback = Feedback.objects.get(pk=self.feedback.pk)
+        self.assertEqual((feedback.score, feedback.num_votes),
+                         (score, num_votes))
+
+    def testRecordVote(self):
+        for vote, expected in ((1, (1, 1)), (1, (1, 1)), (-1, (-1, 1)),
+                               (0, (0, 0)), (0, (0, 0))):
+            Feedback.objects.record_vote(self.feedback, self.user, vote)
+            self.assertScore(*expected)
+
+    def testVoteView(self):
+        self.client.login(username='voter', password='voter')
+        for direction, expected in (('up', (1, 1)), ('down', (-1, 1)),
+                                    ('clear', (0, 0))):
+            response = self.client.post(reverse(
+                'djangovoice_vote', args=[self.feedback.pk, direction]))
+            self.assertEqual(response.status_code, 302)
+            self.assertScore(*expected)
+
+
+class ApiTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.feedback_type = Type.objects.create(title='Idea', slug='idea')
+        Status.objects.create(title='New', slug='new', default=True)
+        self.owner = User.objects.create_user(
+            'owner', 'owner@example.com', 'owner')
+        User.objects.create_user('other', 'other@example.com', 'other')
+        self.owned = Feedback.objects.create(
+            type=self.feedback_type, title='Owned', private=True,
+            user=self.owner)
+        self.anonymous = Feedback.objects.create(
+            type=self.feedback_type, title='Anonymous', private=True,
+            slug=generate_slug())
+
+    def get_item(self, feedback, user, slug=False):
+        # Called directly: a 404 response would need a 404.html template.
+        from django.http import Http404
+        from django.test.client import RequestFactory
+        from djangovoice.api import feedback_detail
+
+        request = RequestFactory().get('/')
+        request.user = user
+        if slug:
+            kwargs = {'slug': feedback.slug}
+        else:
+            kwargs = {'pk': feedback.pk}
+        try:
+            return feedback_detail(request, **kwargs).status_code
+        except Http404:
+            return 404
+
+    def testCanView(self):
+        from django.contrib.auth.models import AnonymousUser
+        from djangovoice.api import can_view
+
+        other = User.objects.get(username='other')
+        staff = User(username='staff', is_staff=True)
+        self.assertTrue(can_view(self.owned, self.owner))
+        self.assertTrue(can_view(self.owned, staff))
+        self.assertFalse(can_view(self.owned, other))
+        self.assertFalse(can_view(self.owned, AnonymousUser()))
+        self.assertFalse(can_view(self.anonymous, AnonymousUser()))
+        self.assertTrue(can_view(
+            self.anonymous, AnonymousUser(), self.anonymous.slug))
+
+    def testPrivateItems(self):
+        from django.contrib.auth.models import AnonymousUser
+
+        anonymous = AnonymousUser()
+        self.assertEqual(self.get_item(self.anonymous, anonymous), 404)
+        self.assertEqual(
+            self.get_item(self.anonymous, anonymous, slug=True), 200)
+        self.assertEqual(self.get_item(self.owned, anonymous), 404)
+
+        other = User.objects.get(username='other')
+        self.assertEqual(self.get_item(self.owned, other), 404)
+        self.assertEqual(self.get_item(self.owned, self.owner), 200)
+
+    def testMineRequiresLogin(self):
+        url = reverse('djangovoice_api_list')
+        self.assertEqual(
+            self.client.get(url, {'list': 'mine'}).status_code, 403)
+
+        self.client.login(username='owner', password='owner')
+        response = self.client.get(url, {'list': 'mine'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue('Owned' in response.content)
+
+    def testAnonymousSubmit(self):
+        from django.utils import simplejson as json
+
+        url = reverse('djangovoice_api_submit')
+        data = {'type': self.feedback_type.pk, 'title': 'Submitted',
+                'email': 'anonymous@example.com'}
+        with self.settings(VOICE_ALLOW_ANONYMOUS_USER_SUBMIT=False):
+            response = self.client.post(
+                url, data, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+            self.assertEqual(response.status_code, 403)
+
+        with self.settings(VOICE_ALLOW_ANONYMOUS_USER_SUBMIT=True):
+            response = self.client.post(
+                url, data, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.content)
+        self.assertTrue(result['feedback']['private'])
+        self.assertEqual(
+            Feedback.objects.get(slug=result['slug']).title, 'Submitted')
+
+
+class SearchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.feedback_type = Type.objects.create(title='Idea', slug='idea')
+        Status.objects.create(title='New', slug='new', default=True)
+
+    def create(self, title, description='', private=False):
+        return Feedback.objects.create(
+            type=self.feedback_type, title=title, description=description,
+            private=private)
+
+    def testPrivateExcluded(self):
+        self.create('Dark theme')
+        self.create('Dark invoices', private=True)
+        url = reverse('djangovoice_search')
+
+        response = self.client.get(url, {'q': 'dark'})
+        self.assertTrue('Dark theme' in response.content)
+        self.assertFalse('Dark invoices' in response.content)
+
+        User.objects.create_user('staff', 'staff@example.com', 'staff')
+        User.objects.filter(username='staff').update(is_staff=True)
+        self.client.login(username='staff', password='staff')
+        response = self.client.get(url, {'q': 'dark'})
+        self.assertTrue('Dark invoices' in response.content)
+
+    def testRanking(self):
+        from djangovoice.search import SimpleSearchBackend, get_backend, \
+            search
+
+        backend = get_backend()
+        if isinstance(backend, SimpleSearchBackend) or \
+                not getattr(backend, 'is_available', lambda: True)():
+            self.skipTest("The search backend does not rank results.")
+
+        strong = self.create('Dark theme', 'A dark mode with dark colours.')
+        weak = self.create(
+            'Colour settings',
+            'Let users pick their own colours for the header, the links, '
+            'the buttons and the footer, maybe also a dark background.')
+
+        results = search(Feedback.objects.all(), 'dark')
+        self.assertEqual([feedback.pk for feedback in results],
+                         [strong.pk, weak.pk])
+
+
+class HotRankTestCase(TestCase):
+    def setUp(self):
+        feedback_type = Type.objects.create(title='Idea', slug='idea')
+        Status.objects.create(title='New', slug='new', default=True)
+        self.feedback = [
+            Feedback.objects.create(type=feedback_type, title='Idea %d' % i)
+            for i in range(3)]
+
+    def testRefresh(self):
+        from django.core.management import call_command
+
+        call_command('djangovoice_refresh_hot_rank', verbosity=0)
+        self.assertTrue(Checkpoint.objects.get(name='hot_rank').timestamp)
+
+        from django.utils import timezone
+
+        Feedback.objects.filter(pk=self.feedback[0].pk).update(
+            score=100, hot_rank=0, modified=timezone.now())
+        call_command('djangovoice_refresh_hot_rank', verbosity=0)
+        feedback = Feedback.objects.get(pk=self.feedback[0].pk)
+        self.assertEqual(feedback.hot_rank, compute_hot_rank(
+            100, 0, feedback.created))
+
+
+class FlushVotesTestCase(TestCase):
+    def setUp(self):
+        feedback_type = Type.objects.create(title='Idea', slug='idea')
+        Status.objects.create(title='New', slug='new', default=True)
+        self.feedback = Feedback.objects.create(
+            type=feedback_type, title='Dark theme')
+        self.user = User.objects.create_user(
+            username='voter', email='voter@example.com')
+
+    def testCoalesce(self):
+        from djangovoice.votes import flush_votes, queue_vote
+
+        for vote in (1, -1, 1):
+            queue_vote(self.feedback, self.user, vote)
+
+        self.assertEqual(flush_votes(), 3)
+        self.assertEqual(flush_votes(), 0)
+
+        feedback = Feedback.objects.get(pk=self.feedback.pk)
+        self.assertEqual((feedback.score, feedback.num_votes), (1, 1))
+
+
+class ThrottleTestCase(unittest.TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def testSlidingWindow(self):
+        from djangovoice.throttle import hit
+
+        self.assertEqual(hit('test', 'ip:1', 2, 60, now=600), 0)
+        self.assertEqual(hit('test', 'ip:1', 2, 60, now=610), 0)
+        self.assertTrue(hit('test', 'ip:1', 2, 60, now=620) > 0)
+
+        # Early in the next window most of the previous one still counts.
+        self.assertTrue(hit('test', 'ip:1', 2, 60, now=665) > 0)
+        self.assertEqual(hit('test', 'ip:2', 2, 60, now=665), 0)
+
+
+class FeedTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        feedback_type = Type.objects.create(title='Idea', slug='idea')
+        Type.objects.create(title='Bug', slug='bug')
+        Status.objects.create(title='New', slug='new', default=True)
+        Feedback.objects.create(type=feedback_type, title='Dark theme')
+        self.url = reverse('feeds_list_type', args=['open', 'idea'])
+
+    def testFilteredAndConditional(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue('Dark theme' in response.content)
+        self.assertFalse('Dark theme' in self.client.get(
+            reverse('feeds_list_type', args=['open', 'bug'])).content)
+
+        response = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def testVotesKeepFeedCached(self):
+        response = self.client.get(self.url)
+        user = User.objects.create_user('voter', 'voter@example.com')
+        Feedback.objects.record_vote(Feedback.objects.get(), user, 1)
+        self.assertEqual(self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        Feedback.objects.create(
+            type=Type.objects.get(slug='idea'), title='Offline mode')
+        self.assertEqual(self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def testUnknownType(self):
+        # Called directly: a 404 response would need a 404.html template.
+        from django.contrib.auth.models import AnonymousUser
+        from django.http import Http404
+        from django.test.client import RequestFactory
+        from djangovoice.feeds import LatestFeedback
+
+        request = RequestFactory().get(
+            reverse('feeds_list_type', args=['open', 'nope']))
+        request.user = AnonymousUser()
+        self.assertRaises(Http404, LatestFeedback(), request,
+                          list='open', type='nope')
+
+
+class InstrumentationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        feedback_type = Type.objects.create(title='Idea', slug='idea')
+        Status.objects.create(title='New', slug='new', default=True)
+        Feedback.objects.create(type=feedback_type, title='Measured')
+
+    def testRecordsListRequest(self):
+        from django.contrib.auth.models import AnonymousUser
+        from django.test.client import RequestFactory
+        from djangovoice import instrumentation
+        from djangovoice.views import FeedbackListView
+
+        get_sinks = instrumentation.get_sinks
+        get_sinks.sinks = [instrumentation.MemorySink()]
+        middleware = instrumentation.InstrumentationMiddleware()
+        request = RequestFactory().get('/feedback/all/')
+        request.user = AnonymousUser()
+        view = FeedbackListView.as_view()
+        try:
+            middleware.process_view(request, view, (), {'list': 'all'})
+            response = middleware.process_template_response(
+                request, view(request, list='all'))
+            response.render()
+            middleware.process_response(request, response)
+        finally:
+            del get_sinks.sinks
+
+        record = instrumentation.buffer[-1]
+        self.assertEqual(record['view'], 'djangovoice.views.FeedbackListView')
+        self.assertTrue(record['queries'] > 0)
+        self.assertTrue(record['cache_misses'] >= 1)
+        self.assertTrue('fragment_cache' in record['tags'])
+
+    def testIgnoresOtherViews(self):
+        from django.test.client import RequestFactory
+        from django.views.generic import RedirectView
+        from djangovoice import instrumentation
+
+        middleware = instrumentation.InstrumentationMiddleware()
+        request = RequestFactory().get('/')
+        view = RedirectView.as_view(url='/feedback/')
+        middleware.process_view(request, view, (), {})
+        self.assertEqual(instrumentation.current(), None)
+        self.assertFalse(connection.use_debug_cursor)
+        middleware.process_response(request, view(request))
+
+    def testApiViewNames(self):
+        from djangovoice import api
+        from djangovoice.instrumentation import view_name
+
+        for view in (api.feedback_list, api.feedback_submit,
+                     api.feedback_vote):
+            self.assertEqual(view_name(view),
+                             'djangovoice.api.%s' % view.__name__)
+        self.assertEqual(api.feedback_vote.__name__, 'feedback_vote')
+
+
+class BulkUpdateTestCase(TestCase):
+    def setUp(self):
+        feedback_type = Type.objects.create(title='Idea', slug='idea')
+        self.new = Status.objects.create(title='New', slug='new', default=True)
+        self.done = Status.objects.create(
+            title='Done', slug='done', status='closed')
+        self.feedback = [
+            Feedback.objects.create(type=feedback_type, title='Idea %d' % i)
+            for i in range(3)]
+
+    def testDefaultSwitch(self):
+        self.done.default = True
+        self.done.save()
+        self.assertEqual(
+            list(Status.objects.filter(default=True)), [self.done])
+
+    def testBulkStatusAndDuplicates(self):
+        from djangovoice.signals import feedback_bulk_updated
+
+        sent = []
+        receiver = lambda sender, pks, changes, **kwargs: sent.append(pks)
+        feedback_bulk_updated.connect(receiver)
+        try:
+            pks = [feedback.pk for feedback in self.feedback]
+            self.assertEqual(
+                Feedback.objects.bulk_update_status(pks, self.done), 3)
+            self.assertEqual(
+                Feedback.objects.mark_duplicates(pks, self.feedback[0]), 2)
+        finally:
+            feedback_bulk_updated.disconnect(receiver)
+
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(Feedback.objects.filter(status=self.done).count(), 3)
+        self.assertEqual(
+            Feedback.objects.filter(duplicate=self.feedback[0]).count(), 2)
+
+    def testQuerysetUpdate(self):
+        selection = Feedback.objects.filter(status=self.new)
+        self.assertEqual(
+            Feedback.objects.mark_duplicates(selection, self.feedback[0]), 2)
+        self.assertEqual(
+            Feedback.objects.bulk_update(selection, private=True), 3)
+        self.assertEqual(Feedback.objects.filter(private=True).count(), 3)
+        self.assertEqual(
+            Feedback.objects.filter(duplicate=self.feedback[0]).count(), 2)
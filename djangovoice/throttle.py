@@ -0,0 +1,146 @@
+"""
+Rate limiting of submissions and votes.
+
+Each scope (e.g. "submit" or "vote") has a rate like "20/h". Hits are
+counted per user for signed in users and per client IP address for
+anonymous ones, so people sharing an office NAT don't share a limit.
+Counters live in fixed windows stored in the cache. The rate of the sliding window is
+estimated from the current and the previous window, weighted by how much
+of the previous window is still covered. A check is a couple of cache
+operations and never touches the database, so rejecting a flood is
+cheap.
+
+Without a usable cache backend (e.g. the dummy cache), the counters are
+kept in process memory instead.
+"""
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.dummy import DummyCache
+
+DEFAULT_RATES = {
+    'submit': '20/h',
+    'vote': '60/m',
+}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def get_rate(scope):
+    """
+    (limit, period in seconds) of a scope, or None when it is not
+    throttled. VOICE_THROTTLE_RATES overrides DEFAULT_RATES per scope; a
+    rate of None turns throttling of the scope off.
+    """
+    rates = dict(DEFAULT_RATES)
+    rates.update(getattr(settings, 'VOICE_THROTTLE_RATES', {}))
+    rate = rates.get(scope)
+    if not rate:
+        return None
+
+    limit, period = rate.split('/')
+
+    return int(limit), PERIODS[period.strip()[0]]
+
+
+class MemoryCounters(object):
+    """
+    In-process fallback of the cache counters.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def incr(self, key, timeout):
+        now = time.time()
+        with self.lock:
+            if len(self.counters) > 10000:
+                self.prune(now)
+            value, expires = self.counters.get(key, (0, now + timeout))
+            if expires <= now:
+                value, expires = 0, now + timeout
+            self.counters[key] = (value + 1, expires)
+
+            return value + 1
+
+    def get(self, key):
+        value, expires = self.counters.get(key, (0, 0))
+
+        return expires > time.time() and value or 0
+
+    def prune(self, now):
+        for key, (value, expires) in self.counters.items():
+            if expires <= now:
+                del self.counters[key]
+
+
+class CacheCounters(object):
+    def incr(self, key, timeout):
+        cache.add(key, 0, timeout)
+        try:
+            return cache.incr(key)
+        except ValueError:  # expired between add and incr
+            cache.set(key, 1, timeout)
+            return 1
+
+    def get(self, key):
+        return cache.get(key, 0)
+
+
+memory_counters = MemoryCounters()
+cache_counters = CacheCounters()
+
+
+def get_counters():
+    if isinstance(cache, DummyCache):
+        return memory_counters
+
+    return cache_counters
+
+
+def hit(scope, ident, limit, period, now=None):
+    """
+    Count a hit of ident and return the number of seconds to wait if it
+    goes over the limit, otherwise 0.
+    """
+    if now is None:
+        now = time.time()
+    window = int(now // period)
+    key = 'djangovoice:throttle:%s:%s:%%d' % (scope, ident)
+    counters = get_counters()
+    try:
+        current = counters.incr(key % window, period * 2)
+        previous = counters.get(key % (window - 1))
+    except Exception:  # cache server unreachable
+        counters = memory_counters
+        current = counters.incr(key % window, period * 2)
+        previous = counters.get(key % (window - 1))
+
+    elapsed = now / period - window
+    if previous * (1 - elapsed) + current <= limit:
+        return 0
+
+    return int(period * (1 - elapsed)) + 1
+
+
+def get_ident(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check(request, scope):
+    """
+    Seconds the client of request has to wait before its next hit of scope
+    is allowed, 0 when it is allowed now.
+    """
+    rate = get_rate(scope)
+    if rate is None:
+        return 0
+
+    if request.user.is_authenticated():
+        ident = 'user:%s' % request.user.pk
+    else:
+        ident = 'ip:%s' % get_ident(request)
+
+    return hit(scope, ident, *rate)
@@ -1,17 +1,10 @@
 from django.conf.urls.defaults import *
 from django.contrib import admin
 admin.autodiscover()
-from voting.views import vote_on_object
-from djangovoice.models import Feedback
 from djangovoice.views import *
 from djangovoice.feeds import LatestFeedback
 
 
-feedback_dict = {
-    'model': Feedback,
-    'template_object_name': 'feedback'
-}
-
 # NOTE: can we do something for pep8 here? lines are too long.
 urlpatterns = patterns(
     '',
@@ -21,10 +14,22 @@ urlpatterns = patterns(
     url(r'^(?P<list>all|open|closed|mine)/(?P<type>[-\w]+)/(?P<status>[-\w]+)/$', view=FeedbackListView.as_view(), name='djangovoice_list_type_status'),
     url(r'^widget/$', view=FeedbackWidgetView.as_view(), name='djangovoice_widget'),
     url(r'^submit/$', view=FeedbackSubmitView.as_view(), name='djangovoice_submit'),
+    url(r'^search/$', view=FeedbackSearchView.as_view(), name='djangovoice_search'),
+    url(r'^export/$', view=FeedbackExportView.as_view(), name='djangovoice_export'),
+    url(r'^instrumentation/$', view=FeedbackInstrumentationView.as_view(), name='djangovoice_instrumentation'),
+    url(r'^api/$', view='djangovoice.api.feedback_list', name='djangovoice_api_list'),
+    url(r'^api/search/$', view='djangovoice.api.feedback_search', name='djangovoice_api_search'),
+    url(r'^api/submit/$', view='djangovoice.api.feedback_submit', name='djangovoice_api_submit'),
+    url(r'^api/(?P<pk>\d+)/$', view='djangovoice.api.feedback_detail', name='djangovoice_api_item'),
+    url(r'^api/(?P<slug>\w+)/$', view='djangovoice.api.feedback_detail', name='djangovoice_api_slug_item'),
+    url(r'^api/(?P<pk>\d+)/(?P<direction>up|down|clear)/$', view='djangovoice.api.feedback_vote', name='djangovoice_api_vote'),
     url(r'^(?P<pk>\d+)/$', view=FeedbackDetailView.as_view(), name='djangovoice_item'),
     url(r'^(?P<slug>\w+)/$', view=FeedbackDetailView.as_view(), name='djangovoice_slug_item'),
     url(r'^(?P<pk>\d+)/edit/$', view=FeedbackEditView.as_view(), name='djangovoice_edit'),
     url(r'^(?P<pk>\d+)/delete/$', view=FeedbackDeleteView.as_view(), name='djangovoice_delete'),
-    url(r'^(?P<object_id>\d+)/(?P<direction>up|down|clear)/?$', vote_on_object, feedback_dict, name='djangovoice_vote'),
+    url(r'^(?P<object_id>\d+)/(?P<direction>up|down|clear)/?$', view=FeedbackVoteView.as_view(), name='djangovoice_vote'),
     url(r'^feeds/latest/$', view=LatestFeedback(), name='feeds_latest'),
+    url(r'^feeds/(?P<list>all|open|closed)/$', view=LatestFeedback(), name='feeds_list'),
+    url(r'^feeds/(?P<list>all|open|closed)/(?P<type>[-\w]+)/$', view=LatestFeedback(), name='feeds_list_type'),
+    url(r'^feeds/(?P<list>all|open|closed)/(?P<type>[-\w]+)/(?P<status>[-\w]+)/$', view=LatestFeedback(), name='feeds_list_type_status'),
 )
@@ -1,4 +1,64 @@
+import base64
+import re
+from contextlib import contextmanager
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator, InvalidPage, EmptyPage
+from django.db import connections
+from django.db.models import Q
+from django.utils import simplejson as json
+from django.utils.hashcompat import md5_constructor
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def queryset_iterator(queryset, chunk_size=1000):
+    """
+    Iterate over a large queryset in primary key order, one chunk per
+    query, so memory stays flat whatever the database driver buffers.
+    """
+    last_pk = None
+    queryset = queryset.order_by('pk')
+    while True:
+        chunk = queryset
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+
+        for item in chunk:
+            yield item
+        last_pk = chunk[-1].pk
+
+
+@contextmanager
+def auto_now_add_disabled(model, name='created'):
+    """
+    Let bulk inserts keep the given values of an auto_now_add field, e.g.
+    the timestamps of imported or generated feedback.
+    """
+    field = model._meta.get_field(name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def make_etag(*parts):
+    return md5_constructor(
+        u':'.join([unicode(part) for part in parts]).encode('utf-8')
+    ).hexdigest()
 
 
 def paginate(queryset, items, request):
@@ -13,3 +73,158 @@ def paginate(queryset, items, request):
         queryset_list = paginator.page(paginator.num_pages)
 
     return queryset_list
+
+
+def estimate_count(queryset):
+    """
+    Number of rows of queryset estimated by the query planner, from table
+    statistics, without counting. Only PostgreSQL gives estimates; None
+    on other databases.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    cursor = connection.cursor()
+    cursor.execute('EXPLAIN ' + sql, params)
+    match = re.search(r'rows=(\d+)', cursor.fetchone()[0])
+
+    return match and int(match.group(1)) or None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that uses the planner estimate as the number of objects when
+    it is above threshold, so large tables are never counted exactly.
+    The number of pages follows the estimate, so the last pages may be
+    empty or missing.
+    """
+    threshold = 10000
+
+    def _get_count(self):
+        if self._count is None:
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate > self.threshold:
+                self._count = estimate
+            else:
+                self._count = self.object_list.count()
+
+        return self._count
+    count = property(_get_count)
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage(object):
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class CursorPaginator(object):
+    """
+    Keyset paginator. Pages are addressed by opaque cursors that encode the
+    ordering values of the boundary row, so the queryset is never counted
+    and deep pages cost the same as the first one.
+
+    All ordering fields must share the same direction, must not be null and
+    the last one should be unique (usually the primary key).
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created', '-id')):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+        self.fields = [field.lstrip('-') for field in ordering]
+        self.descending = ordering[0].startswith('-')
+
+    def encode_cursor(self, obj, direction):
+        values = []
+        for field in self.fields:
+            value = getattr(obj, field)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+
+        data = json.dumps([direction] + values, separators=(',', ':'))
+
+        return base64.urlsafe_b64encode(data).rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            cursor = str(cursor)
+            data = json.loads(
+                base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            direction, values = data[0], data[1:]
+            if direction not in ('n', 'p') or len(values) != len(self.fields):
+                raise InvalidCursor
+
+            opts = self.queryset.model._meta
+            values = [opts.get_field(field).to_python(value)
+                      for field, value in zip(self.fields, values)]
+
+        except (TypeError, ValueError, IndexError, ValidationError):
+            raise InvalidCursor
+
+        return direction, values
+
+    def seek(self, values, forward):
+        lookup = 'lt' if self.descending == forward else 'gt'
+        condition = Q()
+        for index, field in enumerate(self.fields):
+            filters = dict(zip(self.fields[:index], values[:index]))
+            filters['%s__%s' % (field, lookup)] = values[index]
+            condition |= Q(**filters)
+
+        return condition
+
+    def page(self, cursor=None):
+        queryset = self.queryset.order_by(*self.ordering)
+        direction = 'n'
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+            queryset = queryset.filter(self.seek(values, direction == 'n'))
+            if direction == 'p':
+                queryset = queryset.reverse()
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if direction == 'p':
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(rows[-1], 'n')
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(rows[0], 'p')
+
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+
+def cursor_paginate(queryset, items, request, ordering=('-created', '-id')):
+    paginator = CursorPaginator(queryset, items, ordering)
+    try:
+        return paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return paginator.page()
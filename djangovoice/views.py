@@ -1,28 +1,113 @@
+import djangovoice
 from django.conf import settings
+from django.contrib import comments
 from django.contrib import messages
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect
 from django.http import Http404
+from django.middleware.csrf import get_token
+from django.shortcuts import get_object_or_404
+from django.utils import simplejson as json
+from django.utils.translation import get_language
 from django.utils.translation import ugettext as _
-from djangovoice.models import Feedback, Type
+from djangovoice.models import Feedback, VOTE_DIRECTIONS
+from djangovoice.models import generate_slug, status_registry, type_registry
 from djangovoice.forms import *
-from djangovoice.utils import paginate
-import uuid
+from djangovoice.caching import BULK_NAMESPACE, feedback_namespace, \
+    get_timeout, get_versions, make_key
+from djangovoice.decorators import throttle
+from djangovoice.duplicates import find_duplicates
+from djangovoice.export import FORMATS, export
+from djangovoice import instrumentation
+from djangovoice.instrumentation import count_cache
+from djangovoice.search import search
+from djangovoice.votes import buffering_enabled, queue_vote
+from djangovoice.utils import cursor_paginate, make_etag, paginate
 
 # generic views
-from django.views.generic.base import TemplateView
+from django.views.generic.base import TemplateView, View
 from django.views.generic.edit import DeleteView
 from django.views.generic.edit import FormView
 from django.views.generic.detail import DetailView
 
+try:
+    from django.http import StreamingHttpResponse
+except ImportError:  # Django < 1.5 streams iterators given to HttpResponse
+    StreamingHttpResponse = HttpResponse
+
 # decorators
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+CSRF_PLACEHOLDER = 'djangovoice-csrf-token-placeholder'
+
+
+def fragment_cache_version(user, *namespaces):
+    """
+    Value of the ``fragment_cache`` template variable: the versions of the
+    given cache namespaces, keyed per user for signed in users. Pages of
+    staff members are never cached.
+    """
+    if user.is_staff:
+        return None
+
+    version = get_versions(*namespaces)
+    if user.is_authenticated():
+        version = '%s:%s' % (version, user.pk)
+
+    return version
+
+
+def taxonomy_signature():
+    statuses = [(s.pk, s.slug, s.title, s.status) for s in status_registry.all()]
+    types = [(t.pk, t.slug, t.title) for t in type_registry.all()]
+
+    return make_etag(statuses, types)
+
 
-class FeedbackDetailView(DetailView):
+class ConditionalGetMixin(object):
+    """
+    Answers GET with 304 Not Modified when the client already has the
+    ETag returned by get_etag. Pages carrying flash messages are always
+    rendered, so the messages are not lost.
+    """
+
+    def get_etag(self):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        get = super(ConditionalGetMixin, self).get
+        if len(messages.get_messages(request)):
+            return get(request, *args, **kwargs)
+
+        etag_func = lambda request, *args, **kwargs: self.get_etag()
+
+        return condition(etag_func=etag_func)(get)(request, *args, **kwargs)
+
+
+class FeedbackDetailView(ConditionalGetMixin, DetailView):
 
     template_name = 'djangovoice/detail.html'
     model = Feedback
+    comments_per_page = 50
+
+    def get_object(self, queryset=None):
+        if not hasattr(self, '_object'):
+            self._object = super(FeedbackDetailView, self).get_object(queryset)
+
+        return self._object
+
+    def get_etag(self):
+        feedback = self.get_object()
+
+        return make_etag(
+            feedback.pk, feedback.modified, taxonomy_signature(),
+            self.request.user.id, get_language(),
+            self.request.get_full_path())
 
     def get(self, request, *args, **kwargs):
         feedback = self.get_object()
@@ -30,55 +115,130 @@ class FeedbackDetailView(DetailView):
         if feedback.private:
             # Anonymous private feedback can be only accessed with slug
             if not request.user.is_staff and 'slug' not in kwargs and feedback.user == None:
-                return Http404
+                raise Http404
             if not request.user.is_staff and request.user != feedback.user and feedback.user != None:
-                return Http404
+                raise Http404
 
         return super(FeedbackDetailView, self).get(request, *args, **kwargs)
 
+    def get_comment_page(self):
+        """
+        One page of the public comments of the feedback, oldest first, with
+        their users selected in the same query.
+        """
+        if not hasattr(self, '_comment_page'):
+            feedback = self.get_object()
+            comment_list = comments.get_model().objects.filter(
+                content_type=ContentType.objects.get_for_model(feedback),
+                object_pk=unicode(feedback.pk),
+                site__pk=settings.SITE_ID,
+                is_public=True,
+                is_removed=False).select_related('user')
+            self._comment_page = cursor_paginate(
+                comment_list, self.comments_per_page, self.request,
+                ('submit_date', 'id'))
+
+        return self._comment_page
+
+    def get_context_data(self, **kwargs):
+        context = super(FeedbackDetailView, self).get_context_data(**kwargs)
+        feedback = context['object']
+        if not feedback.private:
+            context['fragment_cache'] = fragment_cache_version(
+                self.request.user, 'taxonomy', BULK_NAMESPACE,
+                feedback_namespace(feedback.pk))
+
+        # Evaluated lazily, so a cached comment page costs no query.
+        context.update({
+                'comment_list': lambda: self.get_comment_page().object_list,
+                'comment_pagination': self.get_comment_page,
+                'comment_cursor': self.request.GET.get('cursor', '')})
+
+        return context
+
 
 # FIXME: Can not we use ListView?
-class FeedbackListView(TemplateView):
+class FeedbackListView(ConditionalGetMixin, TemplateView):
 
     template_name = 'djangovoice/list.html'
+    paginate_by = 10
+    orderings = {
+        'new': ('-created', '-id'),
+        'top': ('-score', '-created', '-id'),
+        'hot': ('-hot_rank', '-id'),
+        'discussed': ('-comment_count', '-created', '-id'),
+    }
+
+    def get_sort(self):
+        sort = self.request.GET.get('sort')
+        if sort not in self.orderings:
+            sort = 'new'
+
+        return sort
+
+    def get_queryset(self):
+        return Feedback.objects.filter_list(
+            self.request.user,
+            self.kwargs.get('list', 'open'),
+            self.kwargs.get('type', 'all'),
+            self.kwargs.get('status', 'all'),
+        ).order_by(*self.orderings[self.get_sort()])
+
+    def get_etag(self):
+        # Every change to feedback, its votes and comments, statuses and
+        # types bumps one of these versions, so no query is needed.
+        return make_etag(
+            get_versions('feedback', 'taxonomy'), self.request.user.id,
+            get_language(), self.request.get_full_path())
+
+    def cursor_pagination(self):
+        return getattr(settings, 'VOICE_CURSOR_PAGINATION', False)
+
+    def get_page(self):
+        if not hasattr(self, '_page'):
+            feedback = self.get_queryset().select_related('user')
+            if self.cursor_pagination():
+                page = cursor_paginate(
+                    feedback, self.paginate_by, self.request,
+                    self.orderings[self.get_sort()])
+            else:
+                page = paginate(feedback, self.paginate_by, self.request)
+
+            page.object_list = Feedback.objects.fill_page(
+                list(page.object_list), self.request.user)
+            self._page = page
+
+        return self._page
 
     def get_context_data(self, **kwargs):
         context = super(FeedbackListView, self).get_context_data(**kwargs)
-        feedback = Feedback.objects.all().order_by('-created')
+        sort = self.get_sort()
         feedback_list = kwargs.get('list', 'open')
         feedback_type = kwargs.get('type', 'all')
         feedback_status = kwargs.get('status', 'all')
 
         if feedback_list == 'open':
             title = _("Open Feedback")
-            feedback = feedback.filter(status__status='open')
         elif feedback_list == 'closed':
             title = _("Closed Feedback")
-            feedback = feedback.filter(status__status='closed')
         elif feedback_list == 'mine':
             title = _("My Feedback")
-            feedback = feedback.filter(user=self.request.user)
         else:
             title = _("Feedback")
 
-        if feedback_type != 'all':
-            feedback = feedback.filter(type__slug=feedback_type)
-
-        if feedback_status != 'all':
-            feedback = feedback.filter(status__slug=feedback_status)
-
-        # If user is checking his own feedback, do not filter by private
-        if not self.request.user.is_staff and feedback_list != 'mine':
-            feedback = feedback.filter(private=False)
-
-        feedback_page = paginate(feedback, 10, self.request)
-
+        # The page is evaluated lazily by the template, so nothing is
+        # queried when the list fragment comes from the cache.
         context.update({
-                'feedback_list': feedback_page.object_list,
-                'pagination': feedback_page,
+                'feedback_list': lambda: self.get_page().object_list,
+                'pagination': self.get_page,
+                'cursor_pagination': self.cursor_pagination(),
+                'fragment_cache': fragment_cache_version(
+                    self.request.user, 'feedback', 'taxonomy'),
+                'query_string': self.request.GET.urlencode(),
                 'list': feedback_list,
                 'status': feedback_status,
                 'type': feedback_type,
+                'sort': sort,
                 'navigation_active': feedback_list,
                 'title': title})
 
@@ -92,20 +252,111 @@ class FeedbackListView(TemplateView):
         return super(FeedbackListView, self).get(request, *args, **kwargs)
 
 
-class FeedbackWidgetView(FormView):
+class FeedbackSearchView(TemplateView):
+
+    template_name = 'djangovoice/search.html'
+    paginate_by = 10
+
+    def get_context_data(self, **kwargs):
+        context = super(FeedbackSearchView, self).get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        feedback_page = None
+        if query:
+            feedback = Feedback.objects.filter_list(
+                self.request.user, 'all').select_related('user')
+            feedback_page = paginate(
+                search(feedback, query), self.paginate_by, self.request)
+            feedback_page.object_list = Feedback.objects.fill_page(
+                list(feedback_page.object_list), self.request.user)
+
+        context.update({
+                'query': query,
+                'feedback_list': feedback_page and feedback_page.object_list,
+                'pagination': feedback_page,
+                'title': _("Search")})
+
+        return context
+
+
+class DuplicateCheckMixin(object):
+    """
+    Before saving new feedback, show the user existing feedback that looks
+    like the same thing. Posting again with ``ignore_duplicates`` saves it
+    anyway.
+    """
+
+    def check_duplicates(self, form):
+        if self.request.POST.get('ignore_duplicates') or not getattr(
+                settings, 'VOICE_SUGGEST_DUPLICATES', True):
+            return None
+
+        candidates = find_duplicates(
+            Feedback.objects.filter_list(self.request.user, 'all'),
+            form.cleaned_data.get('title', ''),
+            form.cleaned_data.get('description', ''))
+        if not candidates:
+            return None
+
+        return self.render_to_response(self.get_context_data(
+            form=form, duplicate_candidates=candidates))
+
+
+class FeedbackWidgetView(DuplicateCheckMixin, FormView):
 
     template_name = 'djangovoice/widget.html'
     form_class = WidgetForm
-    initial = {'type': Type.objects.get(pk=1)}
 
-    def get(self, request, *args, **kwargs):
-        return super(FeedbackWidgetView, self).get(request, *args, **kwargs)
+    def get_initial(self):
+        initial = super(FeedbackWidgetView, self).get_initial()
+        default_type = type_registry.get_default()
+        if default_type is not None:
+            initial['type'] = default_type
+
+        return initial
 
+    def get_context_data(self, **kwargs):
+        context = super(FeedbackWidgetView, self).get_context_data(**kwargs)
+        context['version'] = djangovoice.__version__
+
+        return context
+
+    def get(self, request, *args, **kwargs):
+        """
+        The empty form is the same for every visitor with the same language
+        and sign in state, so it is rendered once and cached with a
+        placeholder in place of the CSRF token. Pages carrying flash
+        messages are always rendered.
+        """
+        get = super(FeedbackWidgetView, self).get
+        token = get_token(request)
+        if token is None or len(messages.get_messages(request)):
+            return get(request, *args, **kwargs)
+
+        key = make_key(
+            'widget', djangovoice.__version__, get_versions('taxonomy'),
+            get_language(), request.user.is_authenticated())
+        content = cache.get(key)
+        count_cache(content is not None)
+        if content is None:
+            response = get(request, *args, **kwargs)
+            response.render()
+            if response.status_code != 200:
+                return response
+            content = response.content.replace(token, CSRF_PLACEHOLDER)
+            cache.set(key, content, get_timeout())
+
+        return HttpResponse(content.replace(CSRF_PLACEHOLDER, token))
+
+    @method_decorator(throttle('submit'))
     @method_decorator(login_required)
     def post(self, request, *args, **kwargs):
         return super(FeedbackWidgetView, self).post(request, *args, **kwargs)
 
     def form_valid(self, form):
+        duplicates = self.check_duplicates(form)
+        if duplicates is not None:
+            return duplicates
+
         feedback = form.save(commit=False)
         if form.cleaned_data.get('anonymous') != 'on':
             feedback.user = self.request.user
@@ -124,7 +375,7 @@ class FeedbackWidgetView(FormView):
         return super(FeedbackWidgetView, self).form_invalid(form)
 
 
-class FeedbackSubmitView(FormView):
+class FeedbackSubmitView(DuplicateCheckMixin, FormView):
 
     template_name = 'djangovoice/submit.html'
     form_class = WidgetForm
@@ -134,6 +385,7 @@ class FeedbackSubmitView(FormView):
             return HttpResponseRedirect(reverse('django.contrib.auth.views.login')+"?next=%s" % request.path)
         return super(FeedbackSubmitView, self).get(request, *args, **kwargs)
 
+    @method_decorator(throttle('submit'))
     def post(self, request, *args, **kwargs):
         if self.request.user.is_anonymous() and not getattr(settings, 'VOICE_ALLOW_ANONYMOUS_USER_SUBMIT', False):
             return Http404
@@ -149,6 +401,10 @@ class FeedbackSubmitView(FormView):
         return form
 
     def form_valid(self, form):
+        duplicates = self.check_duplicates(form)
+        if duplicates is not None:
+            return duplicates
+
         feedback = form.save(commit=False)
         if self.request.user.is_anonymous() and getattr(settings, 'VOICE_ALLOW_ANONYMOUS_USER_SUBMIT', False):
             feedback.private = True
@@ -156,7 +412,7 @@ class FeedbackSubmitView(FormView):
             feedback.user = self.request.user
 
         if not feedback.user:
-            feedback.slug = uuid.uuid1().hex[:10]
+            feedback.slug = generate_slug()
 
         feedback.save()
 
@@ -227,3 +483,61 @@ class FeedbackDeleteView(DeleteView):
         feedback.delete()
 
         return HttpResponseRedirect(reverse('djangovoice_home'))
+
+
+class FeedbackVoteView(View):
+
+    @method_decorator(throttle('vote'))
+    @method_decorator(login_required)
+    def post(self, request, *args, **kwargs):
+        feedback = get_object_or_404(Feedback, pk=kwargs.get('object_id'))
+        vote = VOTE_DIRECTIONS[kwargs.get('direction')]
+        if buffering_enabled():
+            queue_vote(feedback, request.user, vote)
+        else:
+            Feedback.objects.record_vote(feedback, request.user, vote)
+
+        next = request.POST.get('next') or feedback.get_absolute_url()
+
+        return HttpResponseRedirect(next)
+
+
+class FeedbackExportView(View):
+
+    content_types = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+    @method_decorator(staff_member_required)
+    def get(self, request, *args, **kwargs):
+        kind = request.GET.get('kind', 'feedback')
+        format = request.GET.get('format', 'csv')
+        if format not in FORMATS:
+            raise Http404
+
+        try:
+            lines = export(kind, format, counts=bool(request.GET.get('counts')))
+        except ValueError:
+            raise Http404
+
+        response = StreamingHttpResponse(
+            lines, content_type=self.content_types[format])
+        response['Content-Disposition'] = \
+            'attachment; filename=%s.%s' % (kind, format)
+
+        return response
+
+
+class FeedbackInstrumentationView(View):
+    """
+    The latest requests recorded by instrumentation.MemorySink, with a
+    summary per view, as JSON.
+    """
+
+    @method_decorator(staff_member_required)
+    def get(self, request, *args, **kwargs):
+        records = list(instrumentation.buffer)
+        data = {'views': instrumentation.summarize(records),
+                'requests': records[::-1]}
+
+        return HttpResponse(
+            json.dumps(data, separators=(',', ':')),
+            content_type='application/json')
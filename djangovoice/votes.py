@@ -0,0 +1,91 @@
+"""
+Buffered voting. With VOICE_BUFFER_VOTES set, a vote is a single insert
+into PendingVote, with no locks. flush_votes later coalesces the buffer
+and applies it in bulk.
+"""
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from voting.models import Vote
+from djangovoice.caching import bump_version, feedback_namespace
+from djangovoice.models import Feedback, PendingVote
+
+
+def buffering_enabled():
+    return getattr(settings, 'VOICE_BUFFER_VOTES', False)
+
+
+def queue_vote(feedback, user, vote):
+    PendingVote.objects.create(feedback=feedback, user=user, vote=vote)
+
+
+def flush_votes(batch_size=1000):
+    """
+    Apply up to batch_size buffered votes in one transaction and return
+    how many buffered rows were consumed.
+
+    Only the latest vote of each user on each feedback counts. It is
+    compared with the stored vote, and the score changes by the
+    difference. Applying the same buffer twice changes nothing, so an
+    interrupted flush can simply run again.
+    """
+    with transaction.commit_on_success():
+        pending = list(PendingVote.objects.select_for_update().order_by(
+            'id')[:batch_size])
+        if not pending:
+            return 0
+
+        latest = {}
+        for row in pending:
+            latest[(row.user_id, row.feedback_id)] = row.vote
+
+        content_type = ContentType.objects.get_for_model(Feedback)
+        existing = {}
+        for vote in Vote.objects.filter(
+                content_type=content_type,
+                object_id__in=set([key[1] for key in latest]),
+                user__in=set([key[0] for key in latest])):
+            existing[(vote.user_id, vote.object_id)] = vote
+
+        created, deleted, updated, deltas = [], [], {}, {}
+        for (user_id, feedback_id), vote in latest.items():
+            current = existing.get((user_id, feedback_id))
+            previous_vote = current and current.vote or 0
+            if vote == previous_vote:
+                continue
+
+            if current is None:
+                created.append(Vote(
+                    user_id=user_id, content_type=content_type,
+                    object_id=feedback_id, vote=vote))
+            elif vote == 0:
+                deleted.append(current.pk)
+            else:
+                updated.setdefault(vote, []).append(current.pk)
+
+            score, num_votes = deltas.get(feedback_id, (0, 0))
+            deltas[feedback_id] = (
+                score + vote - previous_vote,
+                num_votes + int(vote != 0) - int(previous_vote != 0))
+
+        Vote.objects.bulk_create(created)
+        if deleted:
+            Vote.objects.filter(pk__in=deleted).delete()
+        for vote, pks in updated.items():
+            Vote.objects.filter(pk__in=pks).update(vote=vote)
+
+        now = timezone.now()
+        for feedback_id, (score, num_votes) in deltas.items():
+            Feedback.objects.filter(pk=feedback_id).update(
+                score=F('score') + score,
+                num_votes=F('num_votes') + num_votes,
+                modified=now)
+
+        PendingVote.objects.filter(pk__in=[row.pk for row in pending]).delete()
+
+    if deltas:
+        bump_version('feedback', *[feedback_namespace(pk) for pk in deltas])
+
+    return len(pending)
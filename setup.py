@@ -7,14 +7,14 @@ description = file('README.rst', 'r')
 setup(
     name='django-voice',
     version=djangovoice.get_version(),
-    description="A feedback application for Django 1.3 or later",
+    description="A feedback application for Django 1.4 or later",
     long_description=description.read(),
     author=u'Gökmen Görgen',
     author_email='gokmen@alageek.com',
     url='https://github.com/gkmngrgn/django-voice',
     license='BSD',
     platforms='any',
-    packages=find_packages(exclude=('demo', 'demo.*')),
+    packages=find_packages(exclude=('demo', 'demo.*', 'benchmarks', 'benchmarks.*')),
     include_package_data=True,
     zip_safe=False,
     classifiers=[
@@ -24,7 +24,7 @@ setup(
         "Environment :: Web Environment"
     ],
     install_requires=[
-        "Django>=1.3",
+        "Django>=1.4",
         "django-gravatar>=0.1.0",
         "django-voting>=0.1"
     ]